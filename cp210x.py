@@ -0,0 +1,109 @@
+##
+## Silicon Labs CP210x USB serial port, one Xbee dongle
+##
+## The port object stays put when its dongle is unplugged, open() binds it to
+## whichever device is plugged in next, so the link built on it carries on.
+##
+
+import time
+
+# Silicon Labs USB constants
+
+CP210X_IFC_ENABLE         = 0x00
+UART_ENABLE               = 0x0001
+REQTYPE_HOST_TO_INTERFACE = 0x41
+USB_READ_TIMEOUT_MILLIS   = 5000
+USB_WRITE_TIMEOUT_MILLIS  = 5000
+CP210X_SET_BAUDDIV        = 0x01
+CP210X_PURGE              = 0x12
+PURGE_RECEIVE             = 0x000a
+CP210X_VENDOR_ID          = 0x10c4
+BAUD_RATE_GEN_FREQ        = 0x384000
+DEFAULT_BAUDRATE          = 38400
+DEFAULT_READ_BUFFER_SIZE  = 256
+DEFAULT_PACKET_SIZE       = 64
+
+
+class cp210xPort:
+    def __init__(self, usbmanager):
+        self.usbmanager = usbmanager
+        self.device     = None
+        self.connection = None
+
+    def name(self):
+        if self.device == None:
+           return None
+        return self.device.getDeviceName()
+
+    def packetSize(self):
+        if self.connection == None:
+           return DEFAULT_PACKET_SIZE
+        return self.writeEndpoint.getMaxPacketSize()
+
+    # open the dongle and set up the UART
+    def open(self, device):
+        self.close()
+        self.device = device
+        self.connection = self.usbmanager.openDevice(device)
+        if self.connection == None:
+           return False
+
+        self.interface = device.getInterface(0)
+        self.readEndpoint = self.interface.getEndpoint(0)
+        self.writeEndpoint = self.interface.getEndpoint(1)
+
+        buf = None
+
+        result = self.connection.controlTransfer(
+                 REQTYPE_HOST_TO_INTERFACE,
+                 CP210X_IFC_ENABLE,
+                 UART_ENABLE,
+                 0,
+                 buf,
+                 (0 if buf is None else len(buf)),
+                 USB_WRITE_TIMEOUT_MILLIS,
+                 )
+
+        result = self.connection.controlTransfer(
+                 REQTYPE_HOST_TO_INTERFACE,
+                 CP210X_SET_BAUDDIV,
+                 int(BAUD_RATE_GEN_FREQ / DEFAULT_BAUDRATE),
+                 0,
+                 buf,
+                 (0 if buf is None else len(buf)),
+                 USB_WRITE_TIMEOUT_MILLIS,
+                 )
+
+        return True
+
+    def close(self):
+        if self.connection != None:
+           try:
+              self.connection.close()
+           except Exception:
+              pass
+        self.connection = None
+
+    # the scheduler calls this when a frame's turn comes, False if the dongle isn't there
+    def write(self, frame):
+        if self.connection == None:
+           return False
+        return self.connection.bulkTransfer(self.writeEndpoint, frame, len(frame), USB_WRITE_TIMEOUT_MILLIS) >= 0
+
+    # recieve message from Xbee, the link calls this from a worker thread inside a transaction
+    def read(self, timeout=USB_READ_TIMEOUT_MILLIS):
+        connection = self.connection
+        if connection == None:                 # unplugged
+           time.sleep(timeout / 1000)
+           return bytearray()
+        readbuff = bytearray(DEFAULT_READ_BUFFER_SIZE)
+        readlen  = connection.bulkTransfer(self.readEndpoint, readbuff, DEFAULT_READ_BUFFER_SIZE, timeout)
+        if readlen == None or readlen <= 0:
+           return bytearray()
+        return readbuff[:readlen]
+
+    # empty the receive FIFO, leftovers from earlier replies go with it
+    def purge(self):
+        if self.connection == None:
+           return
+        self.connection.controlTransfer(REQTYPE_HOST_TO_INTERFACE, CP210X_PURGE, PURGE_RECEIVE, 0, None, 0, USB_WRITE_TIMEOUT_MILLIS)
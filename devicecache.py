@@ -0,0 +1,46 @@
+##
+## What we remember about each Xbee device between runs, keyed by MAC address
+##
+##  type  - RECEIVER or PROTOTHROTTLE, so we know what to ask it next time
+##  slots - Protothrottle slot directory, PT slot -> 12 byte slot header
+##
+
+import json
+import os
+
+RECEIVER      = 'receiver'
+PROTOTHROTTLE = 'protothrottle'
+
+
+class deviceCache:
+    def __init__(self, filename):
+        self.filename = filename
+        try:
+           with open(self.filename) as f:
+              self.devices = json.load(f)
+        except (OSError, ValueError):
+           self.devices = {}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        tmp = self.filename + ".tmp"
+        with open(tmp, "w") as f:
+           json.dump(self.devices, f)
+        os.replace(tmp, self.filename)        # never leave a half written cache behind
+
+    def slotDirectory(self, mac):
+        slots = self.devices.get(mac, {}).get('slots', {})
+        return { int(sid) : list(header) for sid, header in slots.items() }
+
+    def setSlotDirectory(self, mac, slots):
+        self.devices.setdefault(mac, {})['slots'] = { str(sid) : list(header) for sid, header in slots.items() }
+        self.save()
+
+    def deviceType(self, mac):
+        return self.devices.get(mac, {}).get('type')
+
+    def setDeviceType(self, mac, devtype):
+        if self.deviceType(mac) == devtype:
+           return
+        self.devices.setdefault(mac, {})['type'] = devtype
+        self.save()
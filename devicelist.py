@@ -0,0 +1,77 @@
+##
+## Devices found by the last scan, and which of them are on screen
+##
+## A big layout can answer a scan with hundreds of radios. They're all kept in
+## the index here, but the screen only ever has a handful of row buttons that get
+## pointed at whichever devices are in view, so drawing a scan or a search costs
+## the same however many devices there are.
+##
+## A search matches anywhere in the node ID, the start of the MAC address, or the
+## start of the device type, case doesn't matter.
+##
+
+DEVICE_ROWS = 8                      # row buttons on the screen, one page
+
+
+class deviceIndex:
+    def __init__(self):
+        self.nodes   = {}            # mac -> ascii node id
+        self.types   = {}            # mac -> RECEIVER, PROTOTHROTTLE or None if we haven't asked it yet
+        self.keys    = {}            # mac -> (node id, mac, type) lower case, what a search looks at
+        self.order   = []            # every mac, sorted by node id
+        self.query   = ""
+        self.matched = []            # macs matching query, in order
+        self.first   = 0             # index in matched of the top row
+
+    # a new scan replaces the lot, types is mac -> device type
+    def update(self, nodes, types):
+        self.nodes = dict(nodes)
+        self.types = dict(types)
+        self.keys = {}
+        for mac, nodeid in self.nodes.items():
+            self.keys[mac] = (nodeid.strip().lower(), mac.lower(), (self.types.get(mac) or "").lower())
+        self.order = sorted(self.nodes, key=lambda mac: (self.keys[mac][0], mac))
+        self.query = ""
+        self.matched = self.order
+        self.first = 0
+
+    # a probe found out what a device is, searches by type see it from the next one on
+    def setType(self, mac, devtype):
+        if mac not in self.keys:
+           return
+        self.types[mac] = devtype
+        self.keys[mac] = self.keys[mac][:2] + ((devtype or "").lower(),)
+
+    def matches(self, mac, query):
+        nodeid, address, devtype = self.keys[mac]
+        return query in nodeid or address.startswith(query) or (devtype != "" and devtype.startswith(query))
+
+    # narrowing a search only looks through what the last one matched, so typing stays quick
+    def search(self, query):
+        query = query.strip().lower()
+        if query == self.query:
+           return self.matched
+        if self.query != "" and query.startswith(self.query):
+           pool = self.matched
+        else:
+           pool = self.order
+        self.matched = pool if query == "" else [mac for mac in pool if self.matches(mac, query)]
+        self.query = query
+        self.first = 0
+        return self.matched
+
+    # move the page by rows, it stops at either end
+    def scroll(self, rows):
+        last = max(0, len(self.matched) - DEVICE_ROWS)
+        self.first = max(0, min(last, self.first + rows))
+
+    # the macs in view, one per row button, None for a row with nothing in it
+    def page(self):
+        macs = self.matched[self.first:self.first + DEVICE_ROWS]
+        return macs + [None] * (DEVICE_ROWS - len(macs))
+
+    def describe(self):
+        if not self.matched:
+           return "No devices" if not self.order else "No matches"
+        last = min(len(self.matched), self.first + DEVICE_ROWS)
+        return str(self.first + 1) + "-" + str(last) + " of " + str(len(self.matched))
@@ -0,0 +1,116 @@
+##
+## Frame trace, every frame that goes to or comes from the dongles, with when it
+## went and which transaction it belonged to, for finding where the time goes in a
+## slow transfer on real hardware
+##
+## The links hold a frameTrace only while tracing is on, with none they don't do
+## anything extra at all. The last TRACE_FRAMES lines are kept, older ones drop
+## off the front, and export() writes them out one JSON line per frame:
+##
+##    {"ms": 1520.412, "dir": "TX", "tx": 7, "type": "MRBus R", "len": 22, "data": "7e0012..."}
+##
+## ms is from when the trace started, tx the transaction number, null for frames
+## sent without one. Transactions also get a START and an END line with their name,
+## and every USB read is kept as it came from the dongle too, a READ line, so
+## tools/replay.py can feed a session back through the parsers. What the app
+## itself notes, the startup timings and dongles coming and going, are NOTE lines.
+##
+
+import collections
+import json
+import time
+
+TRACE_FRAMES = 5000
+
+TRACE_TX    = "TX"
+TRACE_RX    = "RX"
+TRACE_START = "START"
+TRACE_END   = "END"
+TRACE_READ  = "READ"
+TRACE_NOTE  = "NOTE"
+
+# Xbee API frame types
+FRAME_TYPES = {
+    0x00 : "TX64",
+    0x01 : "TX16",
+    0x08 : "AT",
+    0x17 : "Remote AT",
+    0x80 : "RX64",
+    0x81 : "RX16",
+    0x88 : "AT reply",
+    0x89 : "TX status",
+    0x97 : "Remote AT reply",
+}
+
+
+# what a frame is, the Xbee frame type and what it carries, MRBus command or receiver command/reply code
+def frameType(frame):
+    if len(frame) < 4:
+       return "short"
+    kind = frame[3]
+    name = FRAME_TYPES.get(kind, "0x%02x" % kind)
+    if kind == 0x01 and len(frame) > 13:
+       return "MRBus " + chr(frame[13])
+    if kind == 0x00 and len(frame) > 14:
+       return name + " " + str(frame[14])
+    if kind == 0x81 and len(frame) > 13:
+       if frame[8] == 0x00:
+          return "Receiver " + str(frame[9])
+       return "MRBus " + chr(frame[13])
+    if kind in (0x08, 0x88) and len(frame) > 6:
+       return name + " " + chr(frame[5]) + chr(frame[6])
+    return name
+
+
+class frameTrace:
+    def __init__(self, size=TRACE_FRAMES):
+        self.frames  = collections.deque(maxlen=size)    # (seconds, direction, transaction, type or name, bytes)
+        self.started = time.monotonic()
+
+    def record(self, direction, frame, txid=None):
+        self.frames.append((time.monotonic(), direction, txid, None, bytes(frame)))
+
+    # bytes as one USB read returned them, frames cut off at either end and all
+    def read(self, data, txid=None):
+        self.frames.append((time.monotonic(), TRACE_READ, txid, "USB read", bytes(data)))
+
+    # start or end of a transaction
+    def mark(self, event, txid, name):
+        self.frames.append((time.monotonic(), event, txid, name, b""))
+
+    # an app event, the text goes where a frame's type would
+    def note(self, text):
+        self.frames.append((time.monotonic(), TRACE_NOTE, None, text, b""))
+
+    def clear(self):
+        self.frames.clear()
+        self.started = time.monotonic()
+
+    # frame types are only worked out here, recording stays as cheap as an append
+    def lines(self):
+        for stamp, direction, txid, name, frame in list(self.frames):
+            yield {
+                "ms"   : round((stamp - self.started) * 1000, 3),
+                "dir"  : direction,
+                "tx"   : txid,
+                "type" : name if name != None else frameType(frame),
+                "len"  : len(frame),
+                "data" : frame.hex(),
+            }
+
+    def export(self, filename):
+        with open(filename, "w") as f:
+           for line in self.lines():
+               f.write(json.dumps(line) + "\n")
+        return len(self.frames)
+
+# the lines of an exported trace, data back as bytes
+def loadTrace(filename):
+    lines = []
+    with open(filename) as f:
+       for line in f:
+           if line.strip():
+              entry = json.loads(line)
+              entry["data"] = bytes.fromhex(entry["data"])
+              lines.append(entry)
+    return lines
@@ -0,0 +1,145 @@
+##
+## Notches screen
+## Loaded by PTApp.loadScreen the first time it is shown
+##
+
+import toga
+from toga.style import Pack
+from toga import Button, MultilineTextInput, Label, TextInput
+from toga.style.pack import COLUMN, ROW, CENTER, RIGHT, LEFT, START, END, HIDDEN, VISIBLE
+
+from .receiverids import *
+
+
+class notchesScreen:
+
+    def __init__(self, app):
+        self.app = app             # the PTApp, its window, link and the device being shown
+
+    # everything on the screen that comes from the receiver, widget id -> value
+    # three bytes per notch from message[11], in low, in high, output
+    def notchesValues(self, button, message):
+        values = { RXNAME : self.app.buttonDict[self.app.macAddress], RXMAC : self.app.macAddress }
+        for n in range(1, 9):
+            base = 11 + 3 * (n - 1)
+            values['NTINL' + str(n)] = message[base]
+            values['NTINH' + str(n)] = message[base + 1]
+            values['NTOUT' + str(n)] = message[base + 1]       # shows in high, same as it always has
+        return values
+
+    def displayNotchesScreen(self, button, message):
+        MARGINTOP = 2
+        LNUMWIDTH = 64
+        SNUMWIDTH = 42
+
+        values = self.notchesValues(button, message)
+        if self.app.showCachedScreen('notches', values):
+           return
+
+        scan_content = toga.Box(style=Pack(direction=COLUMN, margin_left=6))
+
+        # Ascii ID and Mac at top of display
+        idlabel  = toga.Label(values[RXNAME], id=RXNAME, style=Pack(flex=1, color="#000000", align_items=CENTER, font_size=32))
+        maclabel = toga.Label(values[RXMAC], id=RXMAC, style=Pack(flex=1, color="#000000", align_items=CENTER, font_size=12))
+        boxrowA  = toga.Box(children=[idlabel], style=Pack(direction=ROW, align_items=END, margin_top=4))
+        boxrowB  = toga.Box(children=[maclabel], style=Pack(direction=ROW, align_items=END, margin_top=2))
+
+        scan_content.add(boxrowA)
+        scan_content.add(boxrowB)
+
+        title1 = toga.Label("In Low", style=Pack(margin_left=120, margin_top=10))
+        title2 = toga.Label("In High", style=Pack(margin_left=17))
+        title3 = toga.Label("Output", style=Pack(margin_left=15))
+        boxrowB = toga.Box(children=[title1, title2, title3], style=Pack(direction=ROW, align_items=END, margin_top=2))
+        scan_content.add(boxrowB)
+
+        desc   = toga.Label("Notch 1", style=Pack(width=120, align_items=END, font_size=16))
+        ntinl  = toga.NumberInput(id=NTINL1, value=values[NTINL1], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        ntinh  = toga.NumberInput(id=NTINH1, value=values[NTINH1], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        ntout  = toga.NumberInput(id=NTOUT1, value=values[NTOUT1], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        btn    = toga.Button(id=NTPRG1, text="Prg", on_press = self.handle_notchChange, style=Pack(width=55, height=55, margin_top=6, margin_right=5, background_color="#bbbbbb", color="#000000", font_size=12))
+        boxrow = toga.Box(children=[desc, ntinl, ntinh, ntout, btn], style=Pack(direction=ROW, align_items=END, margin_top=1))
+        scan_content.add(boxrow)
+
+        desc   = toga.Label("Notch 2", style=Pack(width=120, align_items=END, font_size=16))
+        ntinl  = toga.NumberInput(id=NTINL2, value=values[NTINL2], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        ntinh  = toga.NumberInput(id=NTINH2, value=values[NTINH2], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        ntout  = toga.NumberInput(id=NTOUT2, value=values[NTOUT2], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        btn    = toga.Button(id=NTPRG2, text="Prg", on_press = self.handle_notchChange, style=Pack(width=55, height=55, margin_top=6, margin_right=5, background_color="#bbbbbb", color="#000000", font_size=12))
+        boxrow = toga.Box(children=[desc, ntinl, ntinh, ntout, btn], style=Pack(direction=ROW, align_items=END, margin_top=1))
+        scan_content.add(boxrow)
+
+        desc   = toga.Label("Notch 3", style=Pack(width=120, align_items=END, font_size=16))
+        ntinl  = toga.NumberInput(id=NTINL3, value=values[NTINL3], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        ntinh  = toga.NumberInput(id=NTINH3, value=values[NTINH3], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        ntout  = toga.NumberInput(id=NTOUT3, value=values[NTOUT3], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        btn    = toga.Button(id=NTPRG3, text="Prg", on_press = self.handle_notchChange, style=Pack(width=55, height=55, margin_top=6, margin_right=5, background_color="#bbbbbb", color="#000000", font_size=12))
+        boxrow = toga.Box(children=[desc, ntinl, ntinh, ntout, btn], style=Pack(direction=ROW, align_items=END, margin_top=1))
+        scan_content.add(boxrow)
+
+        desc   = toga.Label("Notch 4", style=Pack(width=120, align_items=END, font_size=16))
+        ntinl  = toga.NumberInput(id=NTINL4, value=values[NTINL4], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        ntinh  = toga.NumberInput(id=NTINH4, value=values[NTINH4], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        ntout  = toga.NumberInput(id=NTOUT4, value=values[NTOUT4], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        btn    = toga.Button(id=NTPRG4, text="Prg", on_press = self.handle_notchChange, style=Pack(width=55, height=55, margin_top=6, margin_right=5, background_color="#bbbbbb", color="#000000", font_size=12))
+        boxrow = toga.Box(children=[desc, ntinl, ntinh, ntout, btn], style=Pack(direction=ROW, align_items=END, margin_top=1))
+        scan_content.add(boxrow)
+
+        desc   = toga.Label("Notch 5", style=Pack(width=120, align_items=END, font_size=16))
+        ntinl  = toga.NumberInput(id=NTINL5, value=values[NTINL5], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        ntinh  = toga.NumberInput(id=NTINH5, value=values[NTINH5], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        ntout  = toga.NumberInput(id=NTOUT5, value=values[NTOUT5], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        btn    = toga.Button(id=NTPRG5, text="Prg", on_press = self.handle_notchChange, style=Pack(width=55, height=55, margin_top=6, margin_right=5, background_color="#bbbbbb", color="#000000", font_size=12))
+        boxrow = toga.Box(children=[desc, ntinl, ntinh, ntout, btn], style=Pack(direction=ROW, align_items=END, margin_top=1))
+        scan_content.add(boxrow)
+
+        desc   = toga.Label("Notch 6", style=Pack(width=120, align_items=END, font_size=16))
+        ntinl  = toga.NumberInput(id=NTINL6, value=values[NTINL6], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        ntinh  = toga.NumberInput(id=NTINH6, value=values[NTINH6], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        ntout  = toga.NumberInput(id=NTOUT6, value=values[NTOUT6], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        btn    = toga.Button(id=NTPRG6, text="Prg", on_press = self.handle_notchChange, style=Pack(width=55, height=55, margin_top=6, margin_right=5, background_color="#bbbbbb", color="#000000", font_size=12))
+        boxrow = toga.Box(children=[desc, ntinl, ntinh, ntout, btn], style=Pack(direction=ROW, align_items=END, margin_top=1))
+        scan_content.add(boxrow)
+
+        desc   = toga.Label("Notch 7", style=Pack(width=120, align_items=END, font_size=16))
+        ntinl  = toga.NumberInput(id=NTINL7, value=values[NTINL7], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        ntinh  = toga.NumberInput(id=NTINH7, value=values[NTINH7], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        ntout  = toga.NumberInput(id=NTOUT7, value=values[NTOUT7], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        btn    = toga.Button(id=NTPRG7, text="Prg", on_press = self.handle_notchChange, style=Pack(width=55, height=55, margin_top=6, margin_right=5, background_color="#bbbbbb", color="#000000", font_size=12))
+        boxrow = toga.Box(children=[desc, ntinl, ntinh, ntout, btn], style=Pack(direction=ROW, align_items=END, margin_top=1))
+        scan_content.add(boxrow)
+
+        desc   = toga.Label("Notch 8", style=Pack(width=120, align_items=END, font_size=16))
+        ntinl  = toga.NumberInput(id=NTINL8, value=values[NTINL8], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        ntinh  = toga.NumberInput(id=NTINH8, value=values[NTINH8], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        ntout  = toga.NumberInput(id=NTOUT8, value=values[NTOUT8], min=0, max=99, style=Pack(text_align=RIGHT, margin_right=10, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        btn    = toga.Button(id=NTPRG8, text="Prg", on_press = self.handle_notchChange, style=Pack(width=55, height=55, margin_top=6, margin_right=5, background_color="#bbbbbb", color="#000000", font_size=12))
+        boxrow = toga.Box(children=[desc, ntinl, ntinh, ntout, btn], style=Pack(direction=ROW, align_items=END, margin_top=1))
+        scan_content.add(boxrow)
+
+
+        scan = Button(
+            'Scan',
+            on_press=self.app.displayMainWindow,
+            style=Pack(width=120, height=60, margin_top=6, background_color="#cccccc", color="#000000", font_size=12)
+        )
+
+        main = Button(
+            'Main',
+            on_press=self.app.callMainWidgetWindow,
+            style=Pack(width=120, height=60, margin_top=6, background_color="#cccccc", color="#000000", font_size=12)
+        )
+
+
+        boxrow = toga.Box(children=[scan, main], style=Pack(direction=ROW, align_items=CENTER, margin_top=MARGINTOP))
+        scan_content.add(boxrow)
+
+        self.app.scroller = toga.ScrollContainer(content=scan_content, style=Pack(direction=COLUMN, align_items=CENTER))
+        self.app.cacheScreen('notches', self.app.scroller)
+        self.app.main_window.content = self.app.scroller
+        self.app.main_window.show()
+
+
+
+    async def handle_notchChange(self, widget):
+        pass
@@ -0,0 +1,200 @@
+##
+## Protothrottle file formats
+##
+##  .pti - whole PT backup image
+##  .pts - one or more saved slots
+##
+
+import io
+import struct
+import time
+import zlib
+
+from .pttransfer import PT_IMAGE_SIZE, PT_SLOT_SIZE, PT_MAX_SLOTS
+
+##
+## Backup image file
+##
+##  Header, little endian
+##    'PTIM'        magic
+##    version       1 byte
+##    mac           8 bytes, throttle Xbee address
+##    timestamp     4 bytes, seconds since epoch
+##    start         2 bytes, first EE address in the image
+##    size          2 bytes, number of EE bytes
+##    crc           4 bytes, crc32 of the EE bytes
+##  followed by the EE bytes
+##
+
+IMAGE_MAGIC   = b'PTIM'
+IMAGE_VERSION = 1
+IMAGE_HEADER  = struct.Struct('<4sB8sIHHI')
+
+
+def buildImage(mac, start, data):
+    macbytes = bytes.fromhex(mac) if mac else bytes(8)
+    data = bytes(data)
+    header = IMAGE_HEADER.pack(IMAGE_MAGIC, IMAGE_VERSION, macbytes, int(time.time()),
+                               start, len(data), zlib.crc32(data))
+    return header + data
+
+
+##
+## Check and unpack an image, raises ValueError on anything that doesn't look right,
+## including an image that would write outside the config block and slots
+##
+
+def readImage(raw):
+    raw = bytes(raw)
+    if len(raw) < IMAGE_HEADER.size:
+       raise ValueError("file too short for a Protothrottle image")
+
+    magic, version, macbytes, stamp, start, size, crc = IMAGE_HEADER.unpack_from(raw)
+
+    if magic != IMAGE_MAGIC:
+       raise ValueError("not a Protothrottle image")
+    if version != IMAGE_VERSION:
+       raise ValueError("unsupported image version " + str(version))
+
+    data = raw[IMAGE_HEADER.size:]
+    if len(data) != size or zlib.crc32(data) != crc:
+       raise ValueError("image is damaged, crc check failed")
+    if start < 0 or start + size > PT_IMAGE_SIZE:
+       raise ValueError("image runs past the Protothrottle memory the app restores")
+
+    return { 'mac' : macbytes.hex().upper(), 'timestamp' : stamp, 'start' : start, 'data' : data }
+
+
+##
+## Slot file, several slots with an index so one can be pulled out without reading the rest
+##
+##  Header, little endian
+##    'PTSL'        magic
+##    version       1 byte
+##    count         1 byte, number of slots in the file
+##    slot length   2 bytes, EE bytes per slot
+##    timestamp     4 bytes, seconds since epoch
+##  Index, one entry per slot
+##    loco address  2 bytes
+##    slot number   1 byte, PT slot it was saved from
+##    offset        4 bytes, from the start of the file
+##    crc           4 bytes, crc32 of this slot's bytes
+##  crc             4 bytes, crc32 of header and index
+##  followed by the slot bytes
+##
+##  Files without the magic are the old bare dumps saveSlot wrote, 7 reads of 12 bytes
+##  from the start of the slot. The old reply parsing dropped the last byte of every
+##  read, so each read left 11 bytes and the file is 77, with a gap after every 11.
+##  They can't be written as they are, mergeLegacySlot puts them back where they came
+##  from on top of what the slot holds now.
+##
+
+SLOT_MAGIC       = b'PTSL'
+SLOT_VERSION     = 1
+SLOT_HEADER      = struct.Struct('<4sBBHI')
+SLOT_ENTRY       = struct.Struct('<HBII')
+SLOT_CRC         = struct.Struct('<I')
+LEGACY_READS     = 7
+LEGACY_READ_SIZE = 11                 # bytes kept of each 12 byte read
+LEGACY_SLOT_SIZE = LEGACY_READS * LEGACY_READ_SIZE
+
+
+# a slot number and length a PT slot can have, ValueError if not
+def checkSlot(slot, length):
+    if length != PT_SLOT_SIZE:
+       raise ValueError("slot is " + str(length) + " bytes, a Protothrottle slot is " + str(PT_SLOT_SIZE))
+    if slot < 1 or slot > PT_MAX_SLOTS:
+       raise ValueError("slot " + str(slot) + " is outside 1 to " + str(PT_MAX_SLOTS))
+
+# slots is a list of (slot number, data), each a whole PT slot
+def buildSlotFile(slots):
+    if len(slots) == 0 or len(slots) > 255:
+       raise ValueError("a slot file holds 1 to 255 slots")
+
+    slotlen = PT_SLOT_SIZE
+    offset  = SLOT_HEADER.size + SLOT_ENTRY.size * len(slots) + SLOT_CRC.size
+
+    head  = SLOT_HEADER.pack(SLOT_MAGIC, SLOT_VERSION, len(slots), slotlen, int(time.time()))
+    body  = b''
+    for slot, data in slots:
+        data = bytes(data)
+        checkSlot(slot, len(data))
+        loco = data[0] | (data[1] << 8)        # first two bytes are the locomotive address
+        head = head + SLOT_ENTRY.pack(loco, slot, offset, zlib.crc32(data))
+        body = body + data
+        offset = offset + slotlen
+
+    return head + SLOT_CRC.pack(zlib.crc32(head)) + body
+
+
+##
+## Read just the header and index from an open file, raises ValueError if it isn't a good one,
+## or holds anything but whole slots numbered 1 to PT_MAX_SLOTS
+## Returns a dict with the header fields and a list of index entries
+##
+
+def readSlotIndex(f):
+    raw = f.read(SLOT_HEADER.size)
+    if len(raw) < SLOT_HEADER.size:
+       raise ValueError("file too short for a slot file")
+
+    magic, version, count, slotlen, stamp = SLOT_HEADER.unpack(raw)
+
+    if magic != SLOT_MAGIC:
+       raise ValueError("not a Protothrottle slot file")
+    if version != SLOT_VERSION:
+       raise ValueError("unsupported slot file version " + str(version))
+    if count == 0:
+       raise ValueError("slot file has no slots in it")
+
+    index = f.read(SLOT_ENTRY.size * count)
+    crc   = f.read(SLOT_CRC.size)
+    if len(index) != SLOT_ENTRY.size * count or len(crc) != SLOT_CRC.size:
+       raise ValueError("slot file index is truncated")
+    if zlib.crc32(raw + index) != SLOT_CRC.unpack(crc)[0]:
+       raise ValueError("slot file index is damaged, crc check failed")
+
+    entries = []
+    for i in range(0, count):
+        loco, slot, offset, slotcrc = SLOT_ENTRY.unpack_from(index, i * SLOT_ENTRY.size)
+        checkSlot(slot, slotlen)
+        entries.append({ 'loco' : loco, 'slot' : slot, 'offset' : offset, 'crc' : slotcrc })
+
+    return { 'version' : version, 'length' : slotlen, 'timestamp' : stamp, 'slots' : entries }
+
+
+# seek to one slot and check it, only that slot's bytes are read
+def readSlotData(f, header, entry):
+    f.seek(entry['offset'])
+    data = f.read(header['length'])
+    if len(data) != header['length'] or zlib.crc32(data) != entry['crc']:
+       raise ValueError("slot " + str(entry['slot']) + " is damaged, crc check failed")
+    return data
+
+
+##
+## Whole file in memory, as handed back by the document picker
+## Returns a list of (index entry, data), old bare dumps come back as one entry
+## with 'legacy' set and their 77 bytes as they are, see mergeLegacySlot
+##
+
+def readSlotFile(raw):
+    raw = bytes(raw)
+
+    if raw[:4] != SLOT_MAGIC:
+       if len(raw) != LEGACY_SLOT_SIZE:
+          raise ValueError("not a Protothrottle slot file")
+       entry = { 'loco' : raw[0] | (raw[1] << 8), 'slot' : None, 'offset' : 0, 'crc' : zlib.crc32(raw), 'legacy' : True }
+       return [ (entry, raw) ]
+
+    f = io.BytesIO(raw)
+    header = readSlotIndex(f)
+    return [ (entry, readSlotData(f, header, entry)) for entry in header['slots'] ]
+
+# an old bare dump laid back over current, the slot's bytes now, every 12th byte
+# and everything past the 7 reads keep what the slot has
+def mergeLegacySlot(raw, current):
+    data = list(current)
+    for n in range(0, LEGACY_READS):
+        data[n*12:n*12+LEGACY_READ_SIZE] = raw[n*LEGACY_READ_SIZE:(n+1)*LEGACY_READ_SIZE]
+    return data
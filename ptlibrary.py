@@ -0,0 +1,111 @@
+##
+## Local library of saved Protothrottle slots
+##
+## Every slot saved from a PT (or imported from a .pts file) is stored once, named
+## by the sha1 of its bytes, and indexed in a small sqlite database by loco address,
+## PT and date. Lookups never have to open the slot files themselves.
+##
+
+import hashlib
+import os
+import sqlite3
+import time
+
+from .ptfile import *
+from .pttransfer import PT_SLOT_SIZE
+
+LIBRARY_DB = "library.db"
+
+
+class slotLibrary:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(self.path, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(self.path, LIBRARY_DB))
+        self.db.execute("""CREATE TABLE IF NOT EXISTS slots (
+                               hash    TEXT PRIMARY KEY,
+                               loco    INTEGER,
+                               mac     TEXT,
+                               ptname  TEXT,
+                               slot    INTEGER,
+                               saved   INTEGER)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS slots_loco ON slots (loco)")
+        self.db.commit()
+
+    def slotPath(self, hash):
+        return os.path.join(self.path, hash + ".pts")
+
+##
+## Add a slot, returns its hash. Slots we already have are only re-dated
+## Anything but a whole slot numbered 1 to PT_MAX_SLOTS is a ValueError
+##
+
+    def addSlot(self, data, mac, ptname, slot):
+        data = bytes(data)
+        checkSlot(slot, len(data))
+        hash = hashlib.sha1(data).hexdigest()
+        loco = data[0] | (data[1] << 8)           # first two bytes are the locomotive address
+
+        if not os.path.exists(self.slotPath(hash)):
+           with open(self.slotPath(hash), "wb") as f:
+              f.write(buildSlotFile([ (slot, data) ]))
+
+        self.db.execute("""INSERT INTO slots (hash, loco, mac, ptname, slot, saved) VALUES (?, ?, ?, ?, ?, ?)
+                           ON CONFLICT (hash) DO UPDATE SET saved = excluded.saved""",
+                        (hash, loco, mac, ptname, slot, int(time.time())))
+        self.db.commit()
+        return hash
+
+    # every slot in a .pts or .pti file, returns the number added
+    def importFile(self, raw, ptname=""):
+        raw = bytes(raw)
+        count = 0
+
+        if raw[:4] == IMAGE_MAGIC:
+           image = readImage(raw)
+           data = image['data']
+           for offset in range((-image['start']) % PT_SLOT_SIZE, len(data) - PT_SLOT_SIZE + 1, PT_SLOT_SIZE):
+               slot = (image['start'] + offset) // PT_SLOT_SIZE
+               if slot == 0:            # PT config block, not a loco
+                  continue
+               self.addSlot(data[offset:offset+PT_SLOT_SIZE], image['mac'], ptname, slot)
+               count = count + 1
+           return count
+
+        for entry, data in readSlotFile(raw):
+            if entry.get('legacy'):
+               raise ValueError("old slot dumps are missing bytes, load them straight into a slot instead")
+            self.addSlot(data, "", ptname, entry['slot'])
+            count = count + 1
+        return count
+
+##
+## Search by loco address or PT name, newest first
+##
+
+    def find(self, text="", limit=100):
+        text = text.strip()
+        if text == "":
+           rows = self.db.execute("SELECT hash, loco, mac, ptname, slot, saved FROM slots ORDER BY saved DESC LIMIT ?", (limit,))
+        elif text.isdigit():
+           rows = self.db.execute("""SELECT hash, loco, mac, ptname, slot, saved FROM slots
+                                     WHERE loco = ? OR CAST(loco AS TEXT) LIKE ? ORDER BY loco = ? DESC, saved DESC LIMIT ?""",
+                                  (int(text), text + "%", int(text), limit))
+        else:
+           rows = self.db.execute("""SELECT hash, loco, mac, ptname, slot, saved FROM slots
+                                     WHERE ptname LIKE ? OR mac LIKE ? ORDER BY saved DESC LIMIT ?""",
+                                  ("%" + text + "%", text + "%", limit))
+
+        return [ { 'hash' : r[0], 'loco' : r[1], 'mac' : r[2], 'ptname' : r[3], 'slot' : r[4], 'saved' : r[5] } for r in rows ]
+
+    # the slot bytes, checked against the crc in the file
+    def loadSlot(self, hash):
+        with open(self.slotPath(hash), "rb") as f:
+           header = readSlotIndex(f)
+           return readSlotData(f, header, header['slots'][0])
+
+    def removeSlot(self, hash):
+        self.db.execute("DELETE FROM slots WHERE hash = ?", (hash,))
+        self.db.commit()
+        if os.path.exists(self.slotPath(hash)):
+           os.remove(self.slotPath(hash))
@@ -0,0 +1,244 @@
+##
+## Protothrottle EEPROM transfer engine
+##
+## Reads and writes PT memory in MRBus 'R'/'W' blocks. Several requests are kept
+## in flight at once and replies are matched back up by the EE address the PT
+## echoes, so a whole throttle can be read in a handful of USB round trips.
+##
+
+import asyncio
+import time
+
+from .xbeelink import BULK
+
+PT_SLOT_SIZE   = 128
+PT_BLOCK_SIZE  = 12                 # Max length is 12 for all transactions, read and write
+PT_MAX_SLOTS   = 10                 # should be 20 but the PT gets 'stuck' if we ask for more
+PT_IMAGE_SIZE  = PT_SLOT_SIZE * (PT_MAX_SLOTS + 1)   # config block at 0 plus the slots
+
+PIPELINE_DEPTH = 6                  # requests in flight, 6 replies fit in one 256 byte read
+REPLY_WAIT     = 0.1
+MAXRETRIES     = 30
+WINDOW_DEADLINE = 3.0               # seconds one window of requests may hold the link
+
+SLOT_DEADLINE   = 30                # seconds a slot / whole image transfer may take, it stops there and can be resumed
+IMAGE_DEADLINE  = 180
+CHECKPOINT_AGE  = 600               # seconds a stopped transfer can be resumed, the PT may be edited by hand after that
+
+
+##
+## Progress of one transfer. The caller keeps it, so a transfer that times out or
+## loses the link can be run again and pick up at the first block it didn't finish.
+## It only holds while nothing else writes those bytes, the caller drops it then
+##
+
+class transferCheckpoint:
+    def __init__(self):
+        self.read    = {}           # address -> bytes, read and matched to a request
+        self.written = set()        # addresses written and verified by read back
+        self.writes  = None         # restore only, the blocks that differ once the read is done
+        self.count   = 0            # blocks finished in the current stage
+        self.total   = 0
+        self.finished = False
+        self.started = time.monotonic()
+
+    def stale(self):
+        return time.monotonic() - self.started > CHECKPOINT_AGE
+
+    def describe(self):
+        return str(self.count) + "/" + str(self.total) + " blocks"
+
+
+class ptTransfer:
+    def __init__(self, xbee, link, status=None):
+        self.Xbee    = xbee
+        self.link    = link             # xbeeLink, each window of requests is one transaction
+        self.status  = status           # optional progress callback, gets a string
+        self.group   = None             # screen the transactions belong to
+        self.gate    = None             # optional asyncio.Event, background transfers wait for it
+        self.deadline = None            # optional time.monotonic() limit, transfers stop short after it
+
+    def setDeadline(self, seconds):
+        self.deadline = time.monotonic() + seconds
+
+    def expired(self):
+        return self.deadline != None and time.monotonic() > self.deadline
+
+    # background transfers hold off while the gate is closed, then take the link for one window
+    # a window that runs past its deadline just counts as one the PT didn't answer
+    async def runWindow(self, name, job):
+        if self.gate != None:
+           await self.gate.wait()
+        try:
+           await self.link.transact(name, job, WINDOW_DEADLINE, self.group)
+        except asyncio.TimeoutError:
+           pass
+
+    def report(self, text):
+        if self.status != None:
+           self.status(text)
+
+    # break an EE range into (address, length) blocks the PT will accept
+    def blockList(self, start, size):
+        blocks = []
+        address = start
+        while address < start + size:
+            length = min(PT_BLOCK_SIZE, start + size - address)
+            blocks.append((address, length))
+            address = address + length
+        return blocks
+
+    # collect any PT replies sitting in the dongle, keyed by address
+    async def collectReplies(self, tx, wanted, results, found=None):
+        data = await tx.receive()
+        for msg in self.Xbee.splitFrames(len(data), data):
+            reply = self.Xbee.parsePtReply(msg)
+            if reply == None:
+               continue
+            address, block = reply
+            if address in wanted and address not in results and len(block) >= wanted[address]:
+               results[address] = block[:wanted[address]]
+               if found != None:
+                  found(address, results[address])
+
+##
+## Read a list of (address, length) blocks, found is called with each one as it arrives
+## Returns a dict of address -> bytes, short of any the PT never answered
+##
+
+    async def readBlocks(self, blocks, found=None, maxretries=MAXRETRIES, checkpoint=None):
+        if checkpoint == None:
+           checkpoint = transferCheckpoint()
+        results = checkpoint.read
+        pending = [b for b in blocks if b[0] not in results]
+        retries = 0
+        checkpoint.total = len(blocks)
+
+        while pending and not self.expired():
+            window = dict(pending[:PIPELINE_DEPTH])
+
+            await self.runWindow("PT read", lambda tx: self.readWindow(tx, window, results, found))
+
+            remaining = [b for b in pending if b[0] not in results]
+            if len(remaining) == len(pending):
+               retries = retries + 1
+               if retries >= maxretries:
+                  break
+            pending = remaining
+            checkpoint.count = len(blocks) - len(pending)
+
+        return results
+
+    async def readWindow(self, tx, window, results, found):
+        await tx.sendAll([ self.Xbee.ptReadRequest(address, window[address]) for address in window ], BULK)
+
+        await tx.sleep(REPLY_WAIT)
+
+        for x in range(0, len(window)):
+            await self.collectReplies(tx, window, results, found)
+            if all(a in results for a in window):
+               break
+
+##
+## Read a range of PT memory, returns the bytes as a list or [] if the PT stops answering
+##
+
+    async def readRange(self, start, size, checkpoint=None):
+        blocks = self.blockList(start, size)
+        results = await self.readBlocks(blocks, lambda a, d: self.report("Read PT memory " + str(a)), checkpoint=checkpoint)
+        if any(address not in results for address, length in blocks):
+           return []
+
+        data = []
+        for address, length in blocks:
+            data.extend(results[address])
+        if checkpoint != None:
+           checkpoint.finished = True
+        return data
+
+##
+## Write blocks to the PT, each one read back to make sure it 'took'
+## blocks is a list of (address, data), returns True if everything verified
+##
+
+    async def writeBlocks(self, blocks, checkpoint=None):
+        if checkpoint == None:
+           checkpoint = transferCheckpoint()
+        pending = [b for b in blocks if b[0] not in checkpoint.written]
+        retries = 0
+        total = len(blocks)
+        checkpoint.total = total
+
+        while pending:
+            if self.expired():
+               return False
+
+            window = pending[:PIPELINE_DEPTH]
+            results = {}
+
+            await self.runWindow("PT write", lambda tx: self.writeWindow(tx, window, results))
+
+            verified = [b for b in window if results.get(b[0]) == list(b[1])]
+            if not verified:
+               retries = retries + 1
+               if retries >= MAXRETRIES:
+                  return False
+
+            for address, data in verified:
+                checkpoint.written.add(address)
+            pending = [b for b in pending if b not in verified]
+            checkpoint.count = total - len(pending)
+            self.report("Write PT memory " + str(checkpoint.count) + "/" + str(total))
+
+        return True
+
+    async def writeWindow(self, tx, window, results):
+        wanted = {}
+        await tx.sendAll([ self.Xbee.ptWriteRequest(address, data) for address, data in window ], BULK)
+
+        await tx.sleep(REPLY_WAIT)
+
+        for address, data in window:
+            wanted[address] = len(data)
+        await tx.sendAll([ self.Xbee.ptReadRequest(address, len(data)) for address, data in window ], BULK)
+
+        await tx.sleep(REPLY_WAIT)
+
+        for x in range(0, len(window)):
+            await self.collectReplies(tx, wanted, results)
+            if len(results) == len(window):
+               break
+
+##
+## Compare two copies of the same EE range, return the blocks in new that differ from old
+##
+
+    def diffBlocks(self, start, old, new):
+        blocks = []
+        for address, length in self.blockList(start, len(new)):
+            a = address - start
+            if list(old[a:a+length]) != list(new[a:a+length]):
+               blocks.append((address, list(new[a:a+length])))
+        return blocks
+
+##
+## Restore an image, read what the PT has now and only write what changed
+## Returns the number of blocks written, or -1 if it failed
+##
+
+    async def restoreImage(self, start, image, checkpoint=None):
+        if checkpoint == None:
+           checkpoint = transferCheckpoint()
+
+        if checkpoint.writes == None:
+           current = await self.readRange(start, len(image), checkpoint)
+           if not current:
+              return -1
+           checkpoint.writes = self.diffBlocks(start, current, image)
+           checkpoint.finished = False
+
+        blocks = checkpoint.writes
+        if not await self.writeBlocks(blocks, checkpoint):
+           return -1
+        checkpoint.finished = True
+        return len(blocks)
@@ -0,0 +1,151 @@
+##
+## Receiver message ids and the widget ids used on the receiver screens
+##
+
+# Ids for buttons and text/numeric inputs
+
+PTID  = 'PTID'
+PTIDV = 'PTIDV'
+BASE  = 'BASE'
+BASEV = 'BASEV'
+ADDR  = 'ADDR'
+ADDRV = 'ADDRV'
+CONS  = 'CONS'
+CONSV = 'CONSV'
+COND  = 'COND'
+CONDV = 'CONDV'
+DECO  = 'DECO'
+DECOV = 'DECOV'
+
+# Servo screen widget IDs
+
+SV0R   = 'SV0R'      # reverse switch
+SV0LP  = 'SV0LP'     # low program button
+SV0LV  = 'SV0LV'     # low limit value
+SV0LVS = 'SV0LVS'    # low limit slider value
+SV0HP  = 'SV0HP'     # High limit program button
+SV0HV  = 'SV0HV'     # High Limit value
+SV0HVS = 'SV0HVS'    # Hight Limit Slider value
+
+SV1R   = 'SV1R'      # reverse switch
+SV1LP  = 'SV1LP'     # low program button
+SV1LV  = 'SV1LV'     # low limit value
+SV1LVS = 'SV1LVS'    # low limit slider value
+SV1HP  = 'SV1HP'     # High Limit Program
+SV1HV  = 'SV1HV'     # High Limit Value
+SV1HVS = 'SV1HVS'    # High Limit Slider Value
+SV1FC  = 'SV1FC'     # Function code
+SV1FCP = 'SV1FCP'    # Function code program button
+
+SV2R   = 'SV2R'      # reverse switch
+SV2LP  = 'SV2LP'     # low program button
+SV2LV  = 'SV2LV'     # low limit value
+SV2LVS = 'SV2LVS'    # low limit slider value
+SV2HP  = 'SV2HP'     # High Limit Program Button
+SV2HV  = 'SV2HV'     # High Limit value
+SV2HVS = 'SV2HVS'    # High Limit slider value
+SV2FC  = 'SV2FC'     # Function code
+SV2FCP = 'SV2FCP'    # Function code program button
+
+DCCM  = 'DCCM'       # DCC Address fixed or pass through
+DCCA  = 'DCCA'       # DCC Address if fixed
+
+SVRM  = 'SVRM'
+SRVP  = 'SRVP'
+SRVPV = 'SRVPV'
+SRRP  = 'SRRP'
+SRRPV = 'SRRPV'
+
+SRVP0  = 'SRVP0'
+SRVP0V = 'SRVP0V'
+SRVP1  = 'SRVP1'
+SRVP1V = 'SRVP1V'
+SRVP2  = 'SRVP2'
+SRVP2V = 'SRVP2V'
+
+OUTX  = 'OUTX'
+OUTXF = 'OUTXF'
+OUTXS = 'OUTXS'
+OUTY  = 'OUTY'
+OUTYF = 'OUTYF'
+OUTYS = 'OUTYS'
+WDOG  = 'WDOG'
+WDOGV = 'WDOGV'
+BRAT  = 'BRAT'
+BRATV = 'BRATV'
+BFNC  = 'BFNC'
+BFNCV = 'BFNCV'
+ACCL  = 'ACCL'
+ACCLV = 'ACCLV'
+DECL  = 'DECL'
+DECLV = 'DECLV'
+
+NTINL1 = 'NTINL1'
+NTINL2 = 'NTINL2'
+NTINL3 = 'NTINL3'
+NTINL4 = 'NTINL4'
+NTINL5 = 'NTINL5'
+NTINL6 = 'NTINL6'
+NTINL7 = 'NTINL7'
+NTINL8 = 'NTINL8'
+
+NTINH1 = 'NTINH1'
+NTINH2 = 'NTINH2'
+NTINH3 = 'NTINH3'
+NTINH4 = 'NTINH4'
+NTINH5 = 'NTINH5'
+NTINH6 = 'NTINH6'
+NTINH7 = 'NTINH7'
+NTINH8 = 'NTINH8'
+
+NTOUT1 = 'NTOUT1'
+NTOUT2 = 'NTOUT2'
+NTOUT3 = 'NTOUT3'
+NTOUT4 = 'NTOUT4'
+NTOUT5 = 'NTOUT5'
+NTOUT6 = 'NTOUT6'
+NTOUT7 = 'NTOUT7'
+NTOUT8 = 'NTOUT8'
+
+NTPRG1 = 'NTPRG1'
+NTPRG2 = 'NTPRG2'
+NTPRG3 = 'NTPRG3'
+NTPRG4 = 'NTPRG4'
+NTPRG5 = 'NTPRG5'
+NTPRG6 = 'NTPRG6'
+NTPRG7 = 'NTPRG7'
+NTPRG8 = 'NTPRG8'
+
+XBEA   = 'XBEA'
+RXNAME = 'RXNAME'    # receiver name and mac at the top of each receiver screen
+RXMAC  = 'RXMAC'
+PTTEXT = 'PTTEXT'    # status line on the PT screen
+
+
+# MESSAGE IDS for Receiver message side
+GETPHYSICS           = 53
+RETURNNOTCHES        = 36 
+RETURNTYPE           = 37
+
+SETBASEADDRESS       = 38
+SETPROTOADDRESS      = 39
+SETLOCOADDRESS       = 40
+SETCONSISTADDRESS    = 45
+SETCONSISTDIRECTION  = 46
+SETSERVOCONFIG       = 47
+SETTIMEOUT           = 25
+SETOUTPUTSMODE       = 26
+SETSERVOMODE         = 48
+SETACCELERATION      = 54
+SETDECELERATION      = 55
+SETBRAKERATE         = 56
+SETBRAKEFUNCTION     = 57
+FACTORYRESET         = 58
+SETNOTCHMASK         = 51
+SETDCCCVPACKET       = 16
+SETDCCPASSTHRU       = 63
+SETDCCADDRESS        = 62
+
+adprot = { 0x30 :'A', 0x31 :'B', 0x32 :'C', 0x33 :'D', 0x34 :'E', 0x35 :'F', 0x36 : 'G', 0x37 : 'H', 0x38 : 'I', 0x39 : 'J',
+           0x3a : 'K', 0x3b : 'L', 0x3c : 'M', 0x3d : 'N', 0x3e : 'O', 0x3f : 'P', 0x40 : 'Q', 0x41 : 'R', 0x42 : 'S',
+           0x43 : 'T', 0x44 : 'U', 0x45 : 'V', 0x46 : 'W', 0x47 : 'X', 0x48 : 'Y', 0x49 : 'Z' }
@@ -0,0 +1,258 @@
+##
+## Main receiver configure screen and the handlers that program each setting
+## Loaded by PTApp.loadScreen the first time it is shown
+##
+
+import toga
+from toga.style import Pack
+from toga import Button, MultilineTextInput, Label, TextInput
+from toga.style.pack import COLUMN, ROW, CENTER, RIGHT, LEFT, START, END, HIDDEN, VISIBLE
+
+from .receiverids import *
+from .xbeelink import CONTROL
+
+
+class receiverScreen:
+
+    def __init__(self, app):
+        self.app = app             # the PTApp, its window, link and the device being shown
+
+    # everything on the screen that comes from the receiver, widget id -> value
+    def receiverValues(self, button, message):
+        cdir = message[16]
+        consist = 'OFF'
+        if cdir == 1: consist = 'FWD'
+        if cdir == 2: consist = 'REV'
+
+        return {
+            XBEA  : self.app.buttonDict[self.app.macAddress],
+            RXMAC : self.app.macAddress,
+            PTIDV : adprot[message[11]],                 # PT Main Address
+            BASEV : str(message[10]),                    # PT base returned from receiver
+            ADDRV : message[12] | (message[13] << 8),    # 16 bit loco address, this is the address that matches the PT address
+            COND  : consist,
+            CONDV : message[14] | (message[15] << 8),
+            DCCM  : False,
+            DCCA  : 3,
+            WDOGV : chr(message[11]),                    # watchdog value
+            OUTXF : message[35] & 0x7f,                  # X function code
+            OUTXS : (message[35] & 0x80) >> 7,
+            OUTYF : message[36] & 0x7f,
+            OUTYS : (message[36] & 0x80) >> 7,
+        }
+
+    def displayMainWidgetScreen(self, button, message):
+        MARGINTOP = 2
+        LNUMWIDTH = 64
+        SNUMWIDTH = 42
+
+        self.app.buttonSave = button
+        values = self.receiverValues(button, message)
+        if self.app.showCachedScreen('receiver', values):
+           return
+
+        scan_content = toga.Box(style=Pack(direction=COLUMN, margin_left=6))
+
+        # Ascii ID and Mac at top of display
+        btn      = toga.Button(text="Prg", on_press=self.change_xbeeAddr, style=Pack(width=55, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=12))
+        idlabel  = toga.TextInput(id=XBEA, value=values[XBEA], style=Pack(flex=1, color="#000000", align_items=CENTER, font_size=32))
+        maclabel = toga.Label(values[RXMAC], id=RXMAC, style=Pack(flex=1, color="#000000", align_items=CENTER, font_size=12))
+        boxrowA  = toga.Box(children=[idlabel, btn], style=Pack(direction=ROW, align_items=END, margin_top=4))
+        boxrowB  = toga.Box(children=[maclabel], style=Pack(direction=ROW, align_items=END, margin_top=2))
+
+        scan_content.add(boxrowA)
+        scan_content.add(boxrowB)
+
+        ########################################################################  Build Receiver Main Screen
+
+        # Render PT address on the screen
+        btn    = toga.Button(id=PTID, text="Prg", on_press = self.change_ptidaddr, style=Pack(width=55, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=12))
+        desc   = toga.Label("Protothrottle ID", style=Pack(width=265, align_items=END, font_size=18))
+        entry  = toga.TextInput(id=PTIDV, on_change=self.change_ptidaddr, value=values[PTIDV], style=Pack(text_align=RIGHT, height=45, justify_content="center", width=SNUMWIDTH, margin_bottom=2, font_size=18, background_color="#eeeeee", color="#000000"))
+        boxrow = toga.Box(children=[desc, entry, btn], style=Pack(direction=ROW, align_items=END, margin_top=MARGINTOP))
+        scan_content.add(boxrow)
+
+        ######################################################################## PT Base Address
+
+        # Render PT base
+        btn    = toga.Button(id=BASE, text="Prg", on_press = self.change_ptidbase, style=Pack(width=55, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=12))
+        desc   = toga.Label("Base ID", style=Pack(width=265, align_items=END, font_size=18))
+        entry  = toga.NumberInput(id=BASEV, value=values[BASEV], style=Pack(text_align=RIGHT, flex=1, height=45, width=SNUMWIDTH, margin_bottom=2, font_size=18, background_color="#eeeeee", color="#000000"))
+        boxrow = toga.Box(children=[desc, entry, btn], style=Pack(direction=ROW, align_items=END, margin_top=MARGINTOP))
+        scan_content.add(boxrow)
+
+        ######################################################################## Loco Address, the address on the PT that the receiver responds to
+
+        btn    = toga.Button(id=ADDR, text="Prg", on_press = self.change_locoAddr, style=Pack(width=55, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=12))
+        desc   = toga.Label("Loco Address", style=Pack(width=244, align_items=END, font_size=18))
+        entry  = toga.NumberInput(id=ADDRV, value=values[ADDRV], min=0, max=9999, style=Pack(text_align=RIGHT, justify_content="start", height=48, width=LNUMWIDTH, margin_bottom=2, font_size=18, background_color="#eeeeee", color="#000000"))
+        boxrow = toga.Box(children=[desc, entry, btn], style=Pack(direction=ROW, align_items=END, margin_top=MARGINTOP))
+        scan_content.add(boxrow)
+
+        ######################################################################### Consist Address and setting
+
+        btn0   = toga.Button(id=COND, text=values[COND], on_press = self.change_ConsistMode, style=Pack(width=80, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=14))
+        btn1   = toga.Button(id=CONS, text="Prg", on_press = self.change_ConsistAddr, style=Pack(width=55, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=12))
+        desc   = toga.Label("Consist Address", style=Pack(width=164, align_items=END, font_size=18))
+        entry  = toga.NumberInput(id=CONDV, text_align=RIGHT, value=values[CONDV], min=0, max=9999, style=Pack(text_align=RIGHT, flex=1, height=48, width=LNUMWIDTH, font_size=18, background_color="#eeeeee", color="#000000"))
+        boxrow = toga.Box(children=[desc, btn0, entry, btn1], style=Pack(direction=ROW, align_items=END, margin_top=MARGINTOP))
+        scan_content.add(boxrow)
+
+        # ?? DCC address and passthrough, only latest firmware supports this
+
+        
+        btn    = toga.Button(id=DECO, text="Prg", on_press = self.change_DCCAddress, style=Pack(width=55, height=55, margin_top=10, background_color="#bbbbbb", color="#000000", font_size=12))
+        desc   = toga.Label("DCC Addr", style=Pack(width=160, align_items=END, font_size=18))
+        passth = toga.Switch("Fixed", id=DCCM, value=values[DCCM], on_change=self.change_DCCMode)
+        entry  = toga.NumberInput(id=DCCA, value=values[DCCA], min=0, max=9999, style=Pack(text_align=RIGHT, flex=1, height=48, width=LNUMWIDTH, font_size=18, background_color="#eeeeee", color="#000000"))
+        boxrow = toga.Box(children=[desc, passth, entry, btn], style=Pack(direction=ROW, align_items=END, margin_top=MARGINTOP))
+        scan_content.add(boxrow)
+
+        # WatchDog
+        btn    = toga.Button(id=WDOG, text="Prg", on_press = self.change_WatchDog, style=Pack(width=55, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=12))
+        desc   = toga.Label("Watch Dog", style=Pack(width=265, align_items=END, font_size=18))
+        entry  = toga.TextInput(id=WDOGV, value=values[WDOGV], style=Pack(text_align=RIGHT, height=45, justify_content="center", width=SNUMWIDTH, margin_bottom=2, font_size=18, background_color="#eeeeee", color="#000000"))
+        boxrow = toga.Box(children=[desc, entry, btn], style=Pack(direction=ROW, align_items=END, margin_top=MARGINTOP))
+        scan_content.add(boxrow)
+
+        # output X
+        btn    = toga.Button(id=OUTX, text="Prg", on_press = self.change_OutputX, style=Pack(width=55, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=12))
+        desc   = toga.Label("Output X", style=Pack(width=220, align_items=END, font_size=18))
+        entry0 = toga.TextInput(id=OUTXF, value=values[OUTXF], style=Pack(text_align=RIGHT, height=45, width=SNUMWIDTH, margin_bottom=2, font_size=18, background_color="#eeeeee", color="#000000"))
+        entry1 = toga.TextInput(id=OUTXS, value=values[OUTXS], style=Pack(text_align=RIGHT, height=45, width=SNUMWIDTH, margin_bottom=2, margin_left=4, font_size=18, background_color="#eeeeee", color="#000000"))
+        boxrow = toga.Box(children=[desc, entry0, entry1, btn], style=Pack(direction=ROW, align_items=END, margin_top=MARGINTOP))
+        scan_content.add(boxrow)
+
+        # output Y
+        btn    = toga.Button(id=OUTY, text="Prg", on_press = self.change_OutputY, style=Pack(width=55, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=12))
+        desc   = toga.Label("Output Y", style=Pack(width=220, align_items=END, font_size=18))
+        entry0 = toga.TextInput(id=OUTYF, value=values[OUTYF], style=Pack(text_align=RIGHT, height=45, width=SNUMWIDTH, margin_bottom=2, font_size=18, background_color="#eeeeee", color="#000000"))
+        entry1 = toga.TextInput(id=OUTYS, value=values[OUTYS], style=Pack(text_align=RIGHT, height=45, width=SNUMWIDTH, margin_bottom=2, margin_left=4, font_size=18, background_color="#eeeeee", color="#000000"))
+        boxrow = toga.Box(children=[desc, entry0, entry1, btn], style=Pack(direction=ROW, align_items=END, margin_top=MARGINTOP))
+        scan_content.add(boxrow)
+
+        boxrow = toga.Box(style=Pack(direction=ROW, align_items=END, margin_top=MARGINTOP, height=40))
+        scan_content.add(boxrow)
+
+        scan = Button(
+            'Scan',
+            on_press=self.app.displayMainWindow,
+            style=Pack(width=92, height=60, margin_top=6, background_color="#cccccc", color="#000000", font_size=10)
+        )
+
+        physical = Button(
+            'Physical',
+            on_press=self.app.callServoScreen,
+            style=Pack(width=92, height=60, margin_top=6, background_color="#cccccc", color="#000000", font_size=10)
+        )
+
+        notches = Button(
+            'Notch',
+            on_press=self.app.callNotchesScreen,
+            style=Pack(width=92, height=60, margin_top=6, background_color="#cccccc", color="#000000", font_size=10)
+        )
+
+        throttle = Button(
+            'Throttle',
+            on_press=self.app.callThrottleScreen,
+            style=Pack(width=92, height=60, margin_top=6, background_color="#cccccc", color="#000000", font_size=10)
+        )
+
+        boxrow = toga.Box(children=[scan, physical, notches, throttle], style=Pack(direction=ROW, align_items=CENTER, margin_top=MARGINTOP))
+        scan_content.add(boxrow)
+
+        self.app.scroller = toga.ScrollContainer(content=scan_content, style=Pack(direction=COLUMN, align_items=CENTER))
+        self.app.cacheScreen('receiver', self.app.scroller)
+        self.app.main_window.content = self.app.scroller
+        self.app.main_window.show()
+
+    ##
+    #### Support routines for screen above
+    ##
+
+    async def change_xbeeAddr(self, widget):
+        nodeid = str(self.app.widgets[XBEA].value)
+        address = self.app.Xbee.buildAddress(self.app.macAddress)
+
+        # queued together so all three go out in one USB transfer
+        await self.app.link.sendAll([
+            self.app.Xbee.xbeeTransmitRemoteCommand(address, 'N', 'I', nodeid),     # set node id
+            self.app.Xbee.xbeeTransmitRemoteCommand(address, 'A', 'C', ''),         # apply changes
+            self.app.Xbee.xbeeTransmitRemoteCommand(address, 'W', 'R', ''),         # write to eeprom
+        ])
+
+    async def change_ptidaddr(self, widget):
+        ptidaddr = str(self.app.widgets[PTIDV].value)
+        data = chr(SETPROTOADDRESS) + ptiaddr + '234567890123456789'
+        await self.app.sendDataBuffer(data)
+
+    async def change_ptidbase(self, widget):
+        ptidbase = str(self.app.widgets[BASEV].value)
+        p = int(ptidbase)
+        data = chr(SETBASEADDRESS) + chr(p) + '34567890123456789'
+        await self.app.sendDataBuffer(data)
+
+    async def change_locoAddr(self, widget):
+        locoaddr = str(self.app.widgets[ADDRV].value)
+        locoaddr = "0000" + locoaddr
+        locoaddr = locoaddr[-4:]
+        data     = chr(SETLOCOADDRESS) + locoaddr[0] + locoaddr[1] + locoaddr[2] + locoaddr[3] + '567890123456789'
+        await self.app.sendDataBuffer(data)
+
+    async def change_ConsistAddr(self, widget):
+        consistaddr = str(self.app.widgets[CONDV].value)
+        consistaddr = "0000" + consistaddr
+        consistaddr = consistaddr[-4:]
+        data        = chr(SETCONSISTADDRESS) + consistaddr[0] + consistaddr[1] + consistaddr[2] + consistaddr[3] + '567890123456789'
+        await self.app.sendDataBuffer(data)
+
+    async def change_ConsistMode(self, widget):
+        consistdir = str(self.app.widgets[COND].text)
+        cd = 0
+        if consistdir == 'OFF':
+           self.app.widgets[COND].text = 'FWD'
+           cd = 1
+
+        if consistdir == 'FWD':
+           self.app.widgets[COND].text = 'REV'
+           cd = 2
+
+        if consistdir == 'REV':
+           self.app.widgets[COND].text = 'OFF'
+           cd = 0
+
+        data = chr(SETCONSISTDIRECTION) + chr(cd) + '234567890123456789'
+        await self.app.sendDataBuffer(data)
+
+    async def change_DCCMode(self, widget):
+        dccmode = str(self.app.widgets[DCCM].value)
+        if dccmode == True:
+           dcm = 0
+        else:
+           dcm = 1
+        data = chr(SETDCCPASSTHRU) + chr(cd) + '234567890123456789'
+        await self.app.sendDataBuffer(data)
+
+    async def change_DCCAddress(self, widget):
+        dccaddr = str(self.app.widgets[ADDRV].value)
+        dccaddr = "0000" + dccaddr
+        dccaddr = dccaddr[-4:]
+        data     = chr(SETDCCADDRESS) + dccaddr[0] + dccaddr[1] + dccaddr[2] + dccaddr[3] + '567890123456789'
+        await self.app.sendDataBuffer(data)
+
+    async def change_WatchDog(self, widget):
+        wdog = int(self.app.widgets[WDOGV].value)
+        dat  = chr(SETTIMEOUT) + chr(wdv) + '345678901201234567'
+        await self.app.sendDataBuffer(data)
+
+    async def change_OutputX(self, widget):
+        outFunc  = int(self.app.widgets[OUTXF].value)
+        outValue = int(self.app.widgets[OUTXS].value)
+        data = chr(SETOUTPUTSMODE) + chr(1) + chr(outFunc) + chr(outValue) + '5678901201234567'
+        await self.app.sendDataBuffer(data, CONTROL)
+
+    async def change_OutputY(self, widget):
+        outFunc  = int(self.app.widgets[OUTYF].value)
+        outValue = int(self.app.widgets[OUTYS].value)
+        data = chr(SETOUTPUTSMODE) + chr(0) + chr(outFunc) + chr(outValue) + '5678901201234567'
+        await self.app.sendDataBuffer(data, CONTROL)
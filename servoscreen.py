@@ -0,0 +1,314 @@
+##
+## Servo configure screen, servo limits, brake and acceleration
+## Loaded by PTApp.loadScreen the first time it is shown
+##
+
+import toga
+from toga.style import Pack
+from toga import Button, MultilineTextInput, Label, TextInput
+from toga.style.pack import COLUMN, ROW, CENTER, RIGHT, LEFT, START, END, HIDDEN, VISIBLE
+
+from .receiverids import *
+
+
+class servoScreen:
+
+    def __init__(self, app):
+        self.app = app             # the PTApp, its window, link and the device being shown
+
+    # everything on the screen that comes from the receiver, widget id -> value
+    def servoValues(self, button, message, pymessage):
+        svrr = int(message[32])              # Reverse switches, one bit per servo
+
+        return {
+            RXNAME  : self.app.buttonDict[self.app.macAddress],
+            RXMAC   : self.app.macAddress,
+            SV0R    : (svrr & 0x01) == 1,
+            SV0LV   : message[17] | (message[18] << 8),         # servo 0 low limit
+            SV0LVS  : message[17] | (message[18] << 8),
+            'SV0HV' : message[19] | (message[20] << 8),         # servo 0 high limit
+            'SV0HVS': message[19] | (message[20] << 8),
+            SV1R    : (svrr & 0x02) == 2,
+            SV1FC   : message[30],                              # servo 1 function code
+            SV1LV   : message[21] | (message[22] << 8),
+            SV1LVS  : message[21] | (message[22] << 8),
+            SV1HV   : message[23] | (message[24] << 8),
+            SV1HVS  : message[23] | (message[24] << 8),
+            SV2R    : (svrr & 0x04) == 4,
+            SV2FC   : message[31],                              # servo 2 function code
+            SV2LV   : message[25] | (message[26] << 8),
+            SV2LVS  : message[25] | (message[26] << 8),
+            SV2HV   : message[27] | (message[28] << 8),
+            SV2HVS  : message[27] | (message[28] << 8),
+            BRATV   : (pymessage[11] << 8) | pymessage[10],     # Brake rate
+            BFNCV   : pymessage[16],                            # Brake Function Code
+            ACCLV   : (pymessage[13] << 8) | pymessage[12],     # Acceleration Value
+            DECLV   : (pymessage[15] << 8) | pymessage[14],     # Deceleration Value
+        }
+
+    def displayServoScreen(self, button, message, pymessage):
+        MARGINTOP = 2
+        LNUMWIDTH = 64
+        SNUMWIDTH = 42
+
+        values = self.servoValues(button, message, pymessage)
+        if self.app.showCachedScreen('servo', values):
+           return
+
+        scan_content = toga.Box(style=Pack(direction=COLUMN, margin_left=6))
+
+        # Ascii ID and Mac at top of display
+        idlabel  = toga.Label(values[RXNAME], id=RXNAME, style=Pack(flex=1, color="#000000", align_items=CENTER, font_size=32))
+        maclabel = toga.Label(values[RXMAC], id=RXMAC, style=Pack(flex=1, color="#000000", align_items=CENTER, font_size=12))
+        boxrowA  = toga.Box(children=[idlabel], style=Pack(direction=ROW, align_items=END, margin_top=4))
+        boxrowB  = toga.Box(children=[maclabel], style=Pack(direction=ROW, align_items=END, margin_top=2))
+
+        scan_content.add(boxrowA)
+        scan_content.add(boxrowB)
+
+        #############################################################  Servo Mode
+
+        blank  = toga.Label("   ")
+        boxrow = toga.Box(children=[blank, toga.Divider(), blank], style=Pack(direction=COLUMN, margin_top=20))
+        scan_content.add(boxrow)
+
+        btn    = toga.Button(id=SRVP, text="Prg", on_press = self.app.sendPrgCommand, style=Pack(width=55, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=12))
+        desc   = toga.Label("Servo Mode", style=Pack(width=273, align_items=END, margin_bottom=10, font_size=18))
+        mode   = toga.Button(id=SVRM, text="ESC", on_press = self.app.sendPrgCommand, style=Pack(width=90, height=55, background_color="#bbbbbb", color="#000000", font_size=12))
+        boxrow = toga.Box(children=[desc, mode], style=Pack(direction=ROW, align_items=END, margin_top=20))
+        scan_content.add(boxrow)
+
+        ############################################################# 
+
+        boxrow = toga.Box(children=[blank, toga.Divider(), blank], style=Pack(direction=COLUMN, margin_top=20))
+        scan_content.add(boxrow)
+
+        ############################################################# Servo 0 Config
+
+        desc   = toga.Label("Servo 0", style=Pack(width=270, align_items=END, font_size=18))
+        rev    = toga.Switch("Reverse", id=SV0R, value=values[SV0R], on_change=self.handleServo0)
+        boxrow = toga.Box(children=[desc, rev], style=Pack(direction=ROW, align_items=END, margin_top=8))
+        scan_content.add(boxrow)
+
+        # Servo zero always follows the throttle, there is no function code
+
+        desc   = toga.Label("     Low Limit", style=Pack(width=244, align_items=END, font_size=12))
+        entry0 = toga.NumberInput(id=SV0LV, on_change=self.handleServo0, min=0, max=1000, value=values[SV0LV], style=Pack(text_align=RIGHT, flex=1, height=48, width=LNUMWIDTH, font_size=18, background_color="#eeeeee", color="#000000"))
+        btn    = toga.Button(id=SV0LP, text="Prg", on_press = self.handleServo0, style=Pack(width=55, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=12))
+        boxrow = toga.Box(children=[desc, entry0, btn], style=Pack(direction=ROW, align_items=END, margin_top=1))
+        scan_content.add(boxrow)
+
+        desc   = toga.Label(" ", style=Pack(width=20, align_items=END, font_size=18))
+        adj0   = toga.Slider(id=SV0LVS, value=values[SV0LVS], min=0, max=1000, on_change=self.handleServo0, style=Pack(width=320, height=20))
+        boxrow = toga.Box(children=[desc, adj0], style=Pack(direction=ROW, align_items=END))
+        scan_content.add(boxrow)
+
+        btn    = toga.Button(id=SV0HP, text="Prg", on_press = self.app.sendPrgCommand, style=Pack(width=55, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=12))
+        desc   = toga.Label("     High Limit", style=Pack(width=244, align_items=END, font_size=12))
+        entry1 = toga.NumberInput(id='SV0HV', on_change=self.handleServo0, min=0, max=9999, value=values['SV0HV'], style=Pack(text_align=RIGHT, flex=1, height=48, width=LNUMWIDTH, font_size=18, background_color="#eeeeee", color="#000000"))
+        boxrow = toga.Box(children=[desc, entry1, btn], style=Pack(direction=ROW, align_items=END, margin_top=1))
+        scan_content.add(boxrow)
+
+        desc   = toga.Label(" ", style=Pack(width=20, align_items=END, font_size=18))
+        adj0   = toga.Slider(id='SV0HVS', value=values['SV0HVS'], min=0, max=1000, on_change=self.handleServo0, style=Pack(width=320, height=20))
+        boxrow = toga.Box(children=[desc, adj0], style=Pack(direction=ROW, align_items=END))
+        scan_content.add(boxrow)
+
+        ############################################################# 
+
+        boxrow = toga.Box(children=[blank, toga.Divider(), blank], style=Pack(direction=COLUMN, margin_top=20))
+        scan_content.add(boxrow)
+
+        ############################################################# Servo 1 Config
+
+        desc   = toga.Label("Servo 1", style=Pack(width=270, align_items=END, font_size=18))
+        rev    = toga.Switch("Reverse", id=SV1R, value=values[SV1R], on_change=self.handleServo1)
+        boxrow = toga.Box(children=[desc, rev], style=Pack(direction=ROW, align_items=END, margin_top=8))
+        scan_content.add(boxrow)
+
+        btn    = toga.Button(id=SV1FCP, text="Prg", on_press = self.handleServo1, style=Pack(width=55, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=12))
+        desc   = toga.Label("     Function Code", style=Pack(width=260, align_items=END, font_size=12))
+        func   = toga.NumberInput(id=SV1FC, value=values[SV1FC], on_change=self.handleServo1, min=0, max=99, style=Pack(text_align=RIGHT, flex=1, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        boxrow = toga.Box(children=[desc, func, btn], style=Pack(direction=ROW, align_items=END, margin_top=1))
+        scan_content.add(boxrow)
+
+        desc   = toga.Label("     Low Limit", style=Pack(width=244, align_items=END, font_size=12))
+        entry0 = toga.NumberInput(id=SV1LV, value=values[SV1LV], on_change=self.handleServo1, min=0, max=1000, style=Pack(text_align=RIGHT, flex=1, height=48, width=LNUMWIDTH, font_size=18, background_color="#eeeeee", color="#000000"))
+        btn    = toga.Button(id=SV1LP, text="Prg", on_press = self.handleServo1, style=Pack(width=55, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=12))
+        boxrow = toga.Box(children=[desc, entry0, btn], style=Pack(direction=ROW, align_items=END, margin_top=1))
+        scan_content.add(boxrow)
+
+        desc   = toga.Label(" ", style=Pack(width=20, align_items=END, font_size=18))
+        adj0   = toga.Slider(id=SV1LVS, value=values[SV1LVS], min=0, max=1000, on_change=self.handleServo1, style=Pack(width=320, height=20))
+        boxrow = toga.Box(children=[desc, adj0], style=Pack(direction=ROW, align_items=END))
+        scan_content.add(boxrow)
+
+        btn    = toga.Button(id=SV1HP, text="Prg", on_press = self.handleServo1, style=Pack(width=55, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=12))
+        desc   = toga.Label("     High Limit", style=Pack(width=244, align_items=END, font_size=12))
+        entry1  = toga.NumberInput(id=SV1HV, value=values[SV1HV], on_change=self.handleServo1, min=0, max=9999, style=Pack(text_align=RIGHT, flex=1, height=48, width=LNUMWIDTH, font_size=18, background_color="#eeeeee", color="#000000"))
+        boxrow = toga.Box(children=[desc, entry1, btn], style=Pack(direction=ROW, align_items=END, margin_top=1))
+        scan_content.add(boxrow)
+
+        desc   = toga.Label(" ", style=Pack(width=20, align_items=END, font_size=18))
+        adj0   = toga.Slider(id=SV1HVS, value=values[SV1HVS], min=0, max=1000, on_change=self.handleServo1, style=Pack(width=320, height=20))
+        boxrow = toga.Box(children=[desc, adj0], style=Pack(direction=ROW, align_items=END))
+        scan_content.add(boxrow)
+
+        ############################################################# 
+
+        boxrow = toga.Box(children=[blank, toga.Divider(), blank], style=Pack(direction=COLUMN, margin_top=20))
+        scan_content.add(boxrow)
+
+        ############################################################# Servo 2 Config
+
+        desc   = toga.Label("Servo 2", style=Pack(width=270, align_items=END, font_size=18))
+        rev    = toga.Switch("Reverse", id=SV2R, value=values[SV2R], on_change=self.handleServo2)
+        boxrow = toga.Box(children=[desc, rev], style=Pack(direction=ROW, align_items=END, margin_top=8))
+        scan_content.add(boxrow)
+
+        btn    = toga.Button(id=SV2FCP, text="Prg", on_press = self.handleServo2, style=Pack(width=55, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=12))
+        desc   = toga.Label("     Function Code", style=Pack(width=260, align_items=END, font_size=12))
+        func   = toga.NumberInput(id=SV2FC, value=values[SV2FC], on_change=self.handleServo2, min=0, max=99, style=Pack(text_align=RIGHT, flex=1, height=48, width=48, font_size=18, background_color="#eeeeee", color="#000000"))
+        boxrow = toga.Box(children=[desc, func, btn], style=Pack(direction=ROW, align_items=END, margin_top=1))
+        scan_content.add(boxrow)
+
+        desc   = toga.Label("     Low Limit", style=Pack(width=244, align_items=END, font_size=12))
+        entry0 = toga.NumberInput(id=SV2LV, value=values[SV2LV], on_change=self.handleServo2, min=0, max=1000, style=Pack(text_align=RIGHT, flex=1, height=48, width=LNUMWIDTH, font_size=18, background_color="#eeeeee", color="#000000"))
+        btn    = toga.Button(id=SV2LP, text="Prg", on_press = self.handleServo2, style=Pack(width=55, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=12))
+        boxrow = toga.Box(children=[desc, entry0, btn], style=Pack(direction=ROW, align_items=END, margin_top=1))
+        scan_content.add(boxrow)
+
+        desc   = toga.Label(" ", style=Pack(width=20, align_items=END, font_size=18))
+        adj0   = toga.Slider(id=SV2LVS, value=values[SV2LVS], min=0, max=1000, on_change=self.handleServo2, style=Pack(width=320, height=20))
+        boxrow = toga.Box(children=[desc, adj0], style=Pack(direction=ROW, align_items=END))
+        scan_content.add(boxrow)
+
+        btn    = toga.Button(id=SV2HP, text="Prg", on_press = self.handleServo2, style=Pack(width=55, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=12))
+        desc   = toga.Label("     High Limit", style=Pack(width=244, align_items=END, font_size=12))
+        entry1  = toga.NumberInput(id=SV2HV, value=values[SV2HV], on_change=self.handleServo2, min=0, max=9999, style=Pack(text_align=RIGHT, flex=1, height=48, width=LNUMWIDTH, font_size=18, background_color="#eeeeee", color="#000000"))
+        boxrow = toga.Box(children=[desc, entry1, btn], style=Pack(direction=ROW, align_items=END, margin_top=1))
+        scan_content.add(boxrow)
+
+        desc   = toga.Label(" ", style=Pack(width=20, align_items=END, font_size=18))
+        adj0   = toga.Slider(id=SV2HVS, value=values[SV2HVS], min=0, max=1000, on_change=self.handleServo2, style=Pack(width=320, height=20))
+        boxrow = toga.Box(children=[desc, adj0], style=Pack(direction=ROW, align_items=END))
+        scan_content.add(boxrow)
+
+        ##################
+        boxrow = toga.Box(children=[blank, toga.Divider(), blank], style=Pack(direction=COLUMN, margin_top=20))
+        scan_content.add(boxrow)
+
+        ###
+        #### Must get physics data here ######################
+        ##
+
+        btn    = toga.Button(id=BRAT, text="Prg", on_press = self.handle_brakeRate, style=Pack(width=55, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=12))
+        desc   = toga.Label("Brake Rate", style=Pack(width=260, align_items=END, font_size=16))
+        func   = toga.NumberInput(id=BRATV, value=values[BRATV], min=0, max=99, style=Pack(text_align=RIGHT, flex=1, height=48, width=64, font_size=18, background_color="#eeeeee", color="#000000"))
+        boxrow = toga.Box(children=[desc, func, btn], style=Pack(direction=ROW, align_items=END, margin_top=1))
+        scan_content.add(boxrow)
+
+        btn    = toga.Button(id=BFNC, text="Prg", on_press = self.handle_brakeFuncCode, style=Pack(width=55, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=12))
+        desc   = toga.Label("Brake Rate FnCode", style=Pack(width=260, align_items=END, font_size=16))
+        func   = toga.NumberInput(id=BFNCV, value=values[BFNCV], min=0, max=99, style=Pack(text_align=RIGHT, flex=1, height=48, width=64, font_size=18, background_color="#eeeeee", color="#000000"))
+        boxrow = toga.Box(children=[desc, func, btn], style=Pack(direction=ROW, align_items=END, margin_top=1))
+        scan_content.add(boxrow)
+
+        btn    = toga.Button(id=ACCL, text="Prg", on_press = self.handle_acceleration, style=Pack(width=55, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=12))
+        desc   = toga.Label("Acceleration", style=Pack(width=260, align_items=END, font_size=16))
+        func   = toga.NumberInput(id=ACCLV, value=values[ACCLV], min=0, max=99, style=Pack(text_align=RIGHT, flex=1, height=48, width=64, font_size=18, background_color="#eeeeee", color="#000000"))
+        boxrow = toga.Box(children=[desc, func, btn], style=Pack(direction=ROW, align_items=END, margin_top=1))
+        scan_content.add(boxrow)
+
+        btn    = toga.Button(id=DECL, text="Prg", on_press = self.handle_deceleration, style=Pack(width=55, height=55, margin_top=6, background_color="#bbbbbb", color="#000000", font_size=12))
+        desc   = toga.Label("Deceleration", style=Pack(width=260, align_items=END, font_size=16))
+        func   = toga.NumberInput(id=DECLV, value=values[DECLV], min=0, max=99, style=Pack(text_align=RIGHT, flex=1, height=48, width=64, font_size=18, background_color="#eeeeee", color="#000000"))
+        boxrow = toga.Box(children=[desc, func, btn], style=Pack(direction=ROW, align_items=END, margin_top=1))
+        scan_content.add(boxrow)
+
+        boxrow = toga.Box(children=[blank, toga.Divider(), blank], style=Pack(direction=COLUMN, margin_top=20, margin_bottom=20))
+        scan_content.add(boxrow)
+
+        scan = Button(
+            'Scan',
+            on_press=self.app.displayMainWindow,
+            style=Pack(width=120, height=60, margin_top=6, background_color="#cccccc", color="#000000", font_size=12)
+        )
+
+        main = Button(
+            'Main',
+            on_press=self.app.callMainWidgetWindow,
+            style=Pack(width=120, height=60, margin_top=6, background_color="#cccccc", color="#000000", font_size=12)
+        )
+
+        boxrow = toga.Box(children=[scan, main], style=Pack(direction=ROW, align_items=CENTER, margin_top=MARGINTOP))
+        scan_content.add(boxrow)
+
+        self.app.scroller = toga.ScrollContainer(content=scan_content, style=Pack(direction=COLUMN, align_items=CENTER))
+        self.app.cacheScreen('servo', self.app.scroller)
+        self.app.main_window.content = self.app.scroller
+        self.app.main_window.show()
+
+    ##
+    ### Set data routines
+    ##
+
+    async def handle_brakeRate(self, widget):
+        brakerate = str(self.app.widgets[BRATEV].value)
+        s = "000" + brakerate
+        s = s[-3:]
+        data = chr(SETBRAKERATE) + s[2] + s[1] + s[0] + '5678901201234567'
+        await self.app.sendDataBuffer(data)
+
+    async def handle_brakeFuncCode(self, widget):
+        pass
+
+    async def handle_acceleration(self, widget):
+        pass
+
+    async def handle_deceleration(self, widget):
+        pass
+
+        
+    async def handleServo0(self):
+        if self.app.widgets[SV0R].value:
+           rev = "1"
+        else:
+           rev = "0"
+        fc  = "00"
+        l   = "0000" + str(self.app.widgets[SV0LV].value)
+        low = l[-4:]
+        h   = "0000" + str(self.app.widgets[SV0HV].value)
+        hi  = h[-4:]
+        await self.setServoData(0, rev, fc, low, hi)
+
+    async def handleServo1(self):
+        if self.app.widgets[SV1R].value:
+           rev = "1"
+        else:
+           rev = "0"
+        f   = "00" + str(self.app.widgets[SV1FC].value)
+        fc  = f[-2:]
+        l   = "0000" + str(self.app.widgets[SV1LV].value)
+        low = l[-4:]
+        h   = "0000" + str(self.app.widgets[SV1HV].value)
+        hi  = h[-4:]
+        await self.setServoData(1, rev, fc, low, hi)
+
+    async def handleServo2(self):
+        if self.app.widgets[SV2R].value:
+           rev = "1"
+        else:
+           rev = "0"
+        f   = "00" + str(self.app.widgets[SV2FC].value)
+        fc  = f[-2:]
+        l   = "0000" + str(self.app.widgets[SV2LV].value)
+        low = l[-4:]
+        h   = "0000" + str(self.app.widgets[SV2HV].value)
+        hi  = h[-4:]
+        await self.setServoData(2, rev, fc, low, hi)
+
+    async def setServoData(self, num, rev, func, low, hi):
+        data = chr(SETSERVOCONFIG) + str(num) + hi[0] + hi[1] + hi[2] + hi[3] + low[0] + low[1] + low[2] + low[3] + rev + func[0] + func[1] + '3456789'
+        buff = self.app.Xbee.buildXbeeTransmitData(self.app.Xbee.buildAddress(self.app.macAddress), data)
+        await self.app.sendFrame(buff)
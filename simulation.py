@@ -0,0 +1,143 @@
+##
+## PT simulation screen
+## Loaded by PTApp.loadScreen the first time it is shown
+##
+
+import toga
+from toga.style import Pack
+from toga import Button, MultilineTextInput, Label, TextInput
+from toga.style.pack import COLUMN, ROW, CENTER, RIGHT, LEFT, START, END, HIDDEN, VISIBLE
+
+
+class simulationScreen:
+
+    def __init__(self, app):
+        self.app = app             # the PTApp, its window, link and the device being shown
+
+    def protothrottleSimulation(self):
+
+        MARGINTOP = 20
+        LNUMWIDTH = 64
+        SNUMWIDTH = 42
+
+        # nothing on this screen comes from a device, a second visit picks up where the last one left off
+        if self.app.showCachedScreen('simulation', {}):
+           return
+
+        scan_content = toga.Box(style=Pack(direction=COLUMN, margin_left=6))
+
+        blank  = toga.Label("   ", style=Pack(margin=10))
+
+        self.locoAddr = '0000'
+
+        self.loco = toga.NumberInput(value=self.locoAddr, style=Pack(width=120, text_align="center", background_color="#ffffff", font_size=32, margin=2))
+        box  = toga.Box(children=[self.loco], style=Pack(direction=ROW, background_color="#000000", margin_left=140, margin_top=30))
+        scan_content.add(box)
+
+        boxrow = toga.Box(children=[blank, toga.Divider(), blank], style=Pack(direction=COLUMN, margin_top=20, margin_bottom=20))
+        scan_content.add(boxrow)
+
+        notches = toga.Label("8      7      6      5      4      3      2      1      Idle", style=Pack(text_align="justify", width=360, font_size=12, margin_left=28))
+        boxrow = toga.Box(children=[notches], style=Pack(direction=ROW, align_items=CENTER, margin_left=10))
+        scan_content.add(boxrow)
+
+        adj0   = toga.Slider(value=8, min=0, max=8, tick_count=8, on_change=self.handleThrottle, style=Pack(width=360, height=50))
+        boxrow = toga.Box(children=[adj0], style=Pack(direction=ROW, align_items=CENTER, margin_left=10))
+        scan_content.add(boxrow)
+
+        aux  = toga.Button(id="AUX", text="AUX", on_press = self.handleAux, style=Pack(width=75, height=55, margin_top=2, margin_right=5, background_color="#bbbbbb", color="#000000", font_size=12))
+        bln  = toga.Label(" ", style=Pack(width=140, margin_left=20))
+        horn = toga.Button(id="HORN", text="HORN", on_press=self.handleHorn, style=Pack(width=75, height=55, margin_top=2, margin_right=5, background_color="#bbbbbb", color="#000000", font_size=12))
+        boxrow = toga.Box(children=[aux, bln, horn], style=Pack(direction=ROW, margin_top=4, margin_left=30))
+        scan_content.add(boxrow)
+
+        reverser = toga.Label("Rev          N           Fwd", style=Pack(text_align="justify", width=260, font_size=12, margin_left=68, margin_top=20))
+        boxrow = toga.Box(children=[reverser], style=Pack(direction=ROW, align_items=CENTER, margin_left=100))
+        scan_content.add(boxrow)
+
+        bell    = toga.Button(id="BELL", text="BELL", on_press = self.handleBell, style=Pack(width=75, height=55, margin_top=6, margin_right=10, background_color="#bbbbbb", color="#000000", font_size=12))
+        reverse = toga.Slider(value=8, min=0, max=8, tick_count=3, on_change=self.handleReverse, style=Pack(width=180, height=50, margin_left=40))
+        boxrow  = toga.Box(children=[bell, reverse], style=Pack(direction=ROW, align_items=CENTER, margin_top=2, margin_left=30))
+        scan_content.add(boxrow)
+
+        braker = toga.Label("Brake", style=Pack(text_align="justify", width=160, font_size=12))
+        boxrow = toga.Box(children=[braker], style=Pack(direction=ROW, align_items=CENTER, margin_left=100, margin_top=20))
+        scan_content.add(boxrow)
+
+        brake = toga.Slider(value=0, min=0, max=16, on_change=self.handleBrakeLever, style=Pack(width=220, height=50))
+        brfnc  = toga.NumberInput(id="BRFNC", value=11, on_change=self.setBrakeFuncCode, style=Pack(margin_left=20, width=48, height=48, font_size=18))
+        boxrow = toga.Box(children=[brake, brfnc], style=Pack(direction=ROW, align_items=CENTER, margin_left=20))
+        scan_content.add(boxrow)
+
+        Afnc  = toga.Button(id="A", text="A", on_press=self.handleAfunc, style=Pack(width=35, height=55, margin_top=2, margin_right=5, background_color="#bbbbbb", color="#000000", font_size=12))
+        Acode = toga.NumberInput(id="Acode", value=11, on_change=self.setACode, style=Pack(margin_left=20, width=48, height=48, font_size=18))
+        bln   = toga.Label(" ", style=Pack(width=140, margin_left=20))
+        Bfnc  = toga.Button(id="B", text="B", on_press=self.handleBfunc, style=Pack(width=35, height=55, margin_top=2, margin_right=5, background_color="#bbbbbb", color="#000000", font_size=12))
+        Bcode = toga.NumberInput(id="Bcode", value=11, on_change=self.setBCode, style=Pack(margin_left=20, width=48, height=48, font_size=18))
+
+        boxrow = toga.Box(children=[Afnc, bln, Bfnc], style=Pack(direction=ROW, margin_top=4, margin_left=30))
+        scan_content.add(boxrow)
+
+
+        self.number_input = toga.NumberInput(style=Pack(padding=10))   # dummy input to undo focus of loco number input
+        self.number_input.style.visibility = HIDDEN
+        scan_content.add(self.number_input)
+
+        self.scan = Button(
+            'Scan',
+            on_press=self.app.displayMainWindow,
+            style=Pack(width=120, height=60, margin_top=6, background_color="#cccccc", color="#000000", font_size=12)
+        )
+
+        boxrow = toga.Box(children=[self.scan], style=Pack(direction=ROW, align_items=CENTER, margin_top=10, margin_left=140))
+        scan_content.add(boxrow)
+
+        self.app.scroller = toga.ScrollContainer(content=scan_content, style=Pack(direction=COLUMN, align_items=CENTER, background_color="#eeeeee"))
+        self.app.cacheScreen('simulation', self.app.scroller)
+        self.app.main_window.content = self.app.scroller
+        self.app.main_window.show()
+
+
+
+    def handleAfunc(self, widget):
+        pass
+
+    def handleBfunc(self, widget):
+        pass
+
+    def setACode(self, widget):
+        pass
+
+    def setBCode(self, widget):
+        pass
+
+    def setBrakeFuncCode(self, widget):
+        pass
+
+    def confirmInput(self, widget):
+        self.number_input.focus()
+        pass
+
+    def handleThrottle(self, widget):
+        self.number_input.focus()
+        pass
+
+    def handleReverse(self, widget):
+        self.number_input.focus()
+        pass
+
+    def handleBrakeLever(self, widget):
+        self.number_input.focus()
+        pass
+
+    def handleAux(self, widget):
+        self.number_input.focus()
+        pass
+
+    def handleHorn(self, widget):
+        self.number_input.focus()
+        pass
+
+    def handleBell(self, widget):
+        self.number_input.focus()
+        pass
@@ -0,0 +1,51 @@
+##
+## Shared setup for the tests, an emulated network to run the link code on
+##
+## The emulator lives with the desktop tools, it isn't part of the app, so the
+## tools folder goes on the path here. ptapp comes from the briefcase test run
+## when there is one, on a plain checkout the app's own folder is made the
+## ptapp package so pytest runs from the top of the tree with nothing set up.
+##
+
+import importlib.util
+import os
+import sys
+import types
+
+import pytest
+
+TOP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if importlib.util.find_spec("ptapp") == None:
+   package = types.ModuleType("ptapp")
+   package.__path__ = [TOP]
+   sys.modules["ptapp"] = package
+
+sys.path.insert(0, os.path.join(TOP, "tools"))
+
+from emulator import airFaults, emulatedDongle, emulatedProtothrottle, receiverFleet
+from ptapp.xbee import xbeeController
+from ptapp.xbeelink import txScheduler, xbeeLink
+from ptapp.pttransfer import ptTransfer
+
+PT_MAC = "0013A200AB79B005"
+PT_MY  = 0x0010
+
+
+# a dongle with a Protothrottle and receivers on the air around it, and the app's link on it
+class emulatedNetwork:
+    def __init__(self, receivers=0, seed=1, **faults):
+        self.pt = emulatedProtothrottle(PT_MAC, "PT", PT_MY, seed=seed)
+        self.receivers = receiverFleet(receivers, seed)
+        self.dongle = emulatedDongle(self.receivers + [self.pt], airFaults(seed=seed, **faults))
+        self.Xbee = xbeeController()
+        self.link = xbeeLink(self.Xbee, txScheduler(self.dongle.write), self.dongle.read, self.dongle.purge)
+
+    def engine(self):
+        return ptTransfer(self.Xbee, self.link)
+
+
+# network(receivers=.., loss=.., duplicate=..) builds one, see airFaults for the faults
+@pytest.fixture
+def network():
+    return emulatedNetwork
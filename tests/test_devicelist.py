@@ -0,0 +1,74 @@
+##
+## The device list, search and paging over a scan's worth of devices
+##
+
+from ptapp.devicelist import deviceIndex, DEVICE_ROWS
+from ptapp.devicecache import RECEIVER, PROTOTHROTTLE
+
+
+def layout(count):
+    nodes = { "0013A200%08X" % (0x1000 + n) : "RX %03d" % n for n in range(count) }
+    nodes["0013A200AB79B005"] = "Yard PT"
+    types = { mac : RECEIVER for mac in nodes }
+    types["0013A200AB79B005"] = PROTOTHROTTLE
+    index = deviceIndex()
+    index.update(nodes, types)
+    return index
+
+
+def test_sorted_by_node_id():
+    index = layout(20)
+    assert [index.nodes[mac] for mac in index.order[:3]] == ["RX 000", "RX 001", "RX 002"]
+    assert index.nodes[index.order[-1]] == "Yard PT"
+
+
+def test_search_node_id_mac_and_type():
+    index = layout(20)
+    assert [index.nodes[mac] for mac in index.search("rx 01")] == ["RX %03d" % n for n in range(10, 20)]
+    assert index.search("0013a200ab") == ["0013A200AB79B005"]
+    assert index.search("PROTO") == ["0013A200AB79B005"]
+    assert len(index.search("  ")) == 21
+    assert index.search("nothing like it") == []
+    assert index.describe() == "No matches"
+
+
+def test_narrowing_search():
+    index = layout(20)
+    assert len(index.search("rx")) == 20
+    assert len(index.search("rx 00")) == 10
+    assert [index.nodes[mac] for mac in index.search("rx 005")] == ["RX 005"]
+    assert len(index.search("rx")) == 20       # widening again looks at everything
+
+
+def test_set_type():
+    index = layout(5)
+    mac = index.order[0]
+    index.setType(mac, None)
+    assert mac not in index.search("rec")
+    index.setType("not scanned", RECEIVER)
+    assert "not scanned" not in index.types
+
+
+def test_paging():
+    index = layout(20)
+    assert index.page() == index.order[:DEVICE_ROWS]
+    assert index.describe() == "1-8 of 21"
+
+    index.scroll(DEVICE_ROWS)
+    assert index.page() == index.order[DEVICE_ROWS:2*DEVICE_ROWS]
+
+    index.scroll(100)                           # stops with the last page full
+    assert index.page() == index.order[-DEVICE_ROWS:]
+    assert index.describe() == "14-21 of 21"
+
+    index.scroll(-100)
+    assert index.first == 0
+
+
+def test_short_page_and_search_resets_it():
+    index = layout(20)
+    index.scroll(5)
+    matched = index.search("yard")
+    assert index.first == 0
+    assert index.page() == matched + [None] * (DEVICE_ROWS - 1)
+    assert deviceIndex().describe() == "No devices"
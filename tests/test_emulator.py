@@ -0,0 +1,69 @@
+##
+## The emulated Protothrottle answers the way the app expects a real one to,
+## and its fault modes behave as documented in tools/emulator.py
+##
+
+from emulator import emulatedProtothrottle, rxFrame, PT_ADDRESS, PT_SOURCE
+from ptapp.xbee import xbeeController
+from ptapp.pttransfer import PT_SLOT_SIZE, PT_BLOCK_SIZE, PT_MAX_SLOTS
+
+Xbee = xbeeController()
+
+
+# the MRBus packet out of the broadcast frame the app sends
+def request(frame):
+    return frame[8:-1]
+
+def read(pt, address, length=PT_BLOCK_SIZE):
+    return pt.broadcast(request(Xbee.ptReadRequest(address, length)))
+
+def write(pt, address, data):
+    return pt.broadcast(request(Xbee.ptWriteRequest(address, data)))
+
+
+def test_read_reply():
+    pt = emulatedProtothrottle("0013A200AB79B005", "PT", 0x0010, seed=1)
+    replies = read(pt, 2*PT_SLOT_SIZE + 12)
+    assert len(replies) == 1
+    packet = replies[0]
+    assert packet[0] == PT_SOURCE and packet[1] == PT_ADDRESS
+
+    address, data = Xbee.parsePtReply(rxFrame(pt.my, packet))
+    assert address == 2*PT_SLOT_SIZE + 12
+    assert bytes(data) == pt.slot(2)[12:24]
+
+
+def test_too_long_or_not_for_it():
+    pt = emulatedProtothrottle("0013A200AB79B005", "PT", 0x0010, seed=1)
+    assert read(pt, PT_SLOT_SIZE, PT_BLOCK_SIZE + 1) == []
+    assert pt.broadcast(request(Xbee.xbeeBroadCastRequest(PT_ADDRESS + 1, PT_SOURCE, [ord('R'), 0, 1, 12]))) == []
+    damaged = request(Xbee.ptReadRequest(PT_SLOT_SIZE, PT_BLOCK_SIZE))
+    damaged[3] ^= 0x01
+    assert pt.broadcast(damaged) == []
+
+
+def test_write_commit_delay():
+    pt = emulatedProtothrottle("0013A200AB79B005", "PT", 0x0010, seed=1)
+    pt.commitDelay = 60
+    old = pt.slot(1)
+    assert write(pt, PT_SLOT_SIZE, [1, 2, 3]) == []
+    assert pt.slot(1) == old                     # still being written
+    pt.commitAll()
+    assert pt.slot(1)[:3] == bytes([1, 2, 3])
+    assert pt.requests['W'] == 1
+
+
+def test_duplicate_replies():
+    pt = emulatedProtothrottle("0013A200AB79B005", "PT", 0x0010, seed=1)
+    pt.duplicates = 1.0
+    replies = read(pt, PT_SLOT_SIZE)
+    assert len(replies) == 2 and replies[0] == replies[1]
+
+
+def test_stall_past_slot():
+    pt = emulatedProtothrottle("0013A200AB79B005", "PT", 0x0010, seed=1)
+    pt.stallPast = PT_MAX_SLOTS
+    pt.stallTime = 60
+    assert read(pt, PT_MAX_SLOTS * PT_SLOT_SIZE) != []
+    assert read(pt, (PT_MAX_SLOTS + 1) * PT_SLOT_SIZE) == []
+    assert read(pt, PT_SLOT_SIZE) == []          # stuck, nothing answers until it comes back
@@ -0,0 +1,157 @@
+##
+## Backup images and slot files, they come back as they went in and damage is caught
+##
+
+import io
+import zlib
+
+import pytest
+
+from ptapp.ptfile import buildImage, readImage, buildSlotFile, readSlotFile, readSlotIndex, readSlotData, mergeLegacySlot
+from ptapp.ptfile import SLOT_MAGIC, SLOT_VERSION, SLOT_HEADER, SLOT_ENTRY, SLOT_CRC, LEGACY_SLOT_SIZE
+from ptapp.ptlibrary import slotLibrary
+from ptapp.pttransfer import PT_IMAGE_SIZE, PT_SLOT_SIZE, PT_MAX_SLOTS
+
+
+def test_image_round_trip():
+    data = bytes(range(256)) * 5
+    image = readImage(buildImage("0013A200AB79B005", 128, data))
+    assert image['mac'] == "0013A200AB79B005"
+    assert image['start'] == 128
+    assert image['data'] == data
+
+
+def test_image_damaged():
+    raw = bytearray(buildImage("0013A200AB79B005", 0, bytes(256)))
+    raw[-1] ^= 0x80
+    with pytest.raises(ValueError, match="crc"):
+       readImage(raw)
+    with pytest.raises(ValueError, match="too short"):
+       readImage(raw[:10])
+
+
+# a good crc doesn't make it safe to write, it has to land inside the config block and slots
+def test_image_out_of_range():
+    readImage(buildImage("0013A200AB79B005", 0, bytes(PT_IMAGE_SIZE)))
+    with pytest.raises(ValueError, match="runs past"):
+       readImage(buildImage("0013A200AB79B005", PT_SLOT_SIZE, bytes(PT_IMAGE_SIZE)))
+    with pytest.raises(ValueError, match="runs past"):
+       readImage(buildImage("0013A200AB79B005", PT_IMAGE_SIZE, bytes(1)))
+
+
+def slotBytes(seed):
+    return bytes((seed * 37 + i * 11) & 0xff for i in range(PT_SLOT_SIZE))
+
+
+def test_slot_file_round_trip():
+    slots = [ (1, slotBytes(1)), (4, slotBytes(4)), (9, slotBytes(9)) ]
+    raw = buildSlotFile(slots)
+
+    found = readSlotFile(raw)
+    assert [(entry['slot'], data) for entry, data in found] == slots
+    assert found[1][0]['loco'] == slotBytes(4)[0] | (slotBytes(4)[1] << 8)
+
+
+def test_slot_file_one_slot_by_index():
+    raw = buildSlotFile([ (1, slotBytes(1)), (2, slotBytes(2)) ])
+    f = io.BytesIO(raw)
+    header = readSlotIndex(f)
+    assert header['length'] == PT_SLOT_SIZE
+    assert readSlotData(f, header, header['slots'][1]) == slotBytes(2)
+
+
+def test_slot_file_damaged_slot():
+    raw = bytearray(buildSlotFile([ (1, slotBytes(1)), (2, slotBytes(2)) ]))
+    raw[-1] ^= 0x01
+    with pytest.raises(ValueError, match="slot 2 is damaged"):
+       readSlotFile(raw)
+
+
+def test_slot_file_damaged_index():
+    raw = bytearray(buildSlotFile([ (1, slotBytes(1)) ]))
+    raw[SLOT_HEADER.size + 2] ^= 0x01          # slot number in the index
+    with pytest.raises(ValueError, match="index is damaged"):
+       readSlotFile(raw)
+
+
+def test_slot_file_truncated():
+    raw = buildSlotFile([ (1, slotBytes(1)), (2, slotBytes(2)) ])
+    with pytest.raises(ValueError, match="truncated"):
+       readSlotFile(raw[:SLOT_HEADER.size + SLOT_ENTRY.size])
+    with pytest.raises(ValueError):
+       readSlotFile(raw[:-10])
+
+
+def test_slot_file_wrong_version():
+    raw = bytearray(buildSlotFile([ (1, slotBytes(1)) ]))
+    raw[4] = 99
+    with pytest.raises(ValueError, match="unsupported"):
+       readSlotFile(raw)
+
+
+# a file with a good crc can still hold something that isn't a PT slot
+def slotFile(count, slotlen, slot):
+    head = SLOT_HEADER.pack(SLOT_MAGIC, SLOT_VERSION, count, slotlen, 0)
+    data = bytes(slotlen)
+    offset = SLOT_HEADER.size + SLOT_ENTRY.size * count + SLOT_CRC.size
+    for n in range(count):
+        head = head + SLOT_ENTRY.pack(0, slot, offset, zlib.crc32(data))
+    return head + SLOT_CRC.pack(zlib.crc32(head)) + data * count
+
+def test_slot_file_not_a_slot():
+    readSlotFile(slotFile(1, PT_SLOT_SIZE, 1))
+    with pytest.raises(ValueError, match="no slots"):
+       readSlotFile(slotFile(0, PT_SLOT_SIZE, 1))
+    with pytest.raises(ValueError, match="200 bytes"):
+       readSlotFile(slotFile(1, 200, 1))
+    with pytest.raises(ValueError, match="outside"):
+       readSlotFile(slotFile(1, PT_SLOT_SIZE, 0))
+    with pytest.raises(ValueError, match="outside"):
+       readSlotFile(slotFile(1, PT_SLOT_SIZE, PT_MAX_SLOTS + 1))
+
+
+def test_build_rejects_what_isnt_a_slot():
+    with pytest.raises(ValueError):
+       buildSlotFile([ (1, bytes(range(200))) ])
+    with pytest.raises(ValueError):
+       buildSlotFile([ (1, b"") ])
+    with pytest.raises(ValueError):
+       buildSlotFile([ (11, slotBytes(1)) ])
+    with pytest.raises(ValueError):
+       buildSlotFile([])
+
+
+def test_not_a_slot_file():
+    with pytest.raises(ValueError, match="not a Protothrottle slot file"):
+       readSlotFile(bytes(84))
+
+
+# 7 reads of which the old parser kept 11 bytes each, they go back to where they were read from
+def test_legacy_dump():
+    slot = slotBytes(3)
+    raw = b"".join(slot[n*12:n*12+11] for n in range(7))
+    assert len(raw) == LEGACY_SLOT_SIZE
+
+    found = readSlotFile(raw)
+    assert len(found) == 1 and found[0][0]['legacy']
+
+    merged = mergeLegacySlot(raw, bytes(PT_SLOT_SIZE))
+    for n in range(7):
+        assert merged[n*12:n*12+11] == list(slot[n*12:n*12+11])
+        assert merged[n*12+11] == 0
+    assert merged[84:] == [0] * 44
+
+
+def test_library_import(tmp_path):
+    library = slotLibrary(str(tmp_path))
+    assert library.importFile(buildSlotFile([ (2, slotBytes(2)), (3, slotBytes(3)) ]), "Yard PT") == 2
+    found = library.find("Yard")
+    assert sorted(entry['slot'] for entry in found) == [2, 3]
+    assert library.loadSlot(found[0]['hash']) in (slotBytes(2), slotBytes(3))
+
+    for raw in (slotFile(1, 200, 1), slotFile(0, PT_SLOT_SIZE, 1), b"".join(slotBytes(1)[n*12:n*12+11] for n in range(7))):
+        with pytest.raises(ValueError):
+           library.importFile(raw)
+    with pytest.raises(ValueError):
+       library.addSlot(bytes(range(200)), "", "", 1)
+    assert len(library.find()) == 2
@@ -0,0 +1,107 @@
+##
+## PT memory transfers against an emulated throttle, on a clean air and a bad one
+##
+
+import asyncio
+
+from ptapp.pttransfer import transferCheckpoint, PT_SLOT_SIZE, PT_BLOCK_SIZE, CHECKPOINT_AGE
+
+
+SLOT = 3 * PT_SLOT_SIZE
+
+
+def edited(pt, start, changes):
+    image = list(pt.ee[start:start+PT_SLOT_SIZE])
+    for offset, value in changes:
+        image[offset] = value
+    return image
+
+
+def test_read_range(network):
+    net = network()
+    data = asyncio.run(net.engine().readRange(SLOT, PT_SLOT_SIZE))
+    assert bytes(data) == net.pt.slot(3)
+    assert net.pt.requests['R'] == len(net.engine().blockList(SLOT, PT_SLOT_SIZE))
+
+
+def test_read_range_loss_and_duplicates(network):
+    net = network(loss=0.15, duplicate=0.2, seed=7)
+    net.pt.duplicates = 0.3
+    data = asyncio.run(net.engine().readRange(SLOT, PT_SLOT_SIZE))
+    assert bytes(data) == net.pt.slot(3)
+
+
+# replies that come back damaged are thrown out, not put in the backup
+def test_read_range_corruption(network):
+    net = network(corrupt=0.1, seed=3)
+    data = asyncio.run(net.engine().readRange(SLOT, PT_SLOT_SIZE))
+    assert bytes(data) == net.pt.slot(3)
+
+
+def test_restore_image(network):
+    net = network()
+    image = edited(net.pt, SLOT, [(5, 0x11), (6, 0x22), (100, 0x33)])
+    written = asyncio.run(net.engine().restoreImage(SLOT, image))
+    assert written == 2                          # only the two blocks that changed
+    assert list(net.pt.slot(3)) == image
+
+
+# the PT takes a while to commit a write, the first read backs still see the old bytes
+def test_restore_image_commit_delay_and_loss(network):
+    net = network(loss=0.1, duplicate=0.1, seed=11)
+    net.pt.commitDelay = 0.3
+    image = edited(net.pt, SLOT, [(0, 0x01), (30, 0x02), (127, 0x03)])
+    written = asyncio.run(net.engine().restoreImage(SLOT, image))
+    assert written == 3
+    net.pt.commitAll()
+    assert list(net.pt.slot(3)) == image
+
+
+def test_read_resumes_from_checkpoint(network):
+    net = network()
+    checkpoint = transferCheckpoint()
+    blocks = len(net.engine().blockList(SLOT, PT_SLOT_SIZE))
+
+    async def run():
+        engine = net.engine()
+        engine.setDeadline(0.01)                 # out of time after the first window
+        assert await engine.readRange(SLOT, PT_SLOT_SIZE, checkpoint) == []
+        done = len(checkpoint.read)
+        assert 0 < done < blocks
+
+        sent = net.pt.requests['R']
+        data = await net.engine().readRange(SLOT, PT_SLOT_SIZE, checkpoint)
+        assert bytes(data) == net.pt.slot(3)
+        assert net.pt.requests['R'] - sent == blocks - done
+    asyncio.run(run())
+    assert checkpoint.finished
+
+
+def test_restore_resumes_from_checkpoint(network):
+    net = network()
+    image = edited(net.pt, SLOT, [(n * PT_BLOCK_SIZE, n) for n in range(10)])
+    checkpoint = transferCheckpoint()
+
+    async def run():
+        # the read is already done, the first run only gets one window of writes in
+        engine = net.engine()
+        await engine.readRange(SLOT, PT_SLOT_SIZE, checkpoint)
+        checkpoint.writes = engine.diffBlocks(SLOT, net.pt.slot(3), image)
+        engine.setDeadline(0.01)
+        assert await engine.restoreImage(SLOT, image, checkpoint) == -1
+        done = len(checkpoint.written)
+        assert 0 < done < 10
+
+        sent = net.pt.requests['W']
+        assert await net.engine().restoreImage(SLOT, image, checkpoint) == 10
+        assert net.pt.requests['W'] - sent == 10 - done
+    asyncio.run(run())
+    assert list(net.pt.slot(3)) == image
+
+
+# a checkpoint from long ago isn't resumed, the throttle may have been edited by hand since
+def test_checkpoint_goes_stale():
+    checkpoint = transferCheckpoint()
+    assert not checkpoint.stale()
+    checkpoint.started = checkpoint.started - CHECKPOINT_AGE - 1
+    assert checkpoint.stale()
@@ -0,0 +1,51 @@
+##
+## Frame parsers, the bytes that start a frame can turn up inside one too
+##
+
+from emulator import ndReply, rxFrame, finish
+from ptapp.xbee import xbeeController
+from ptapp.xbeequery import RECEIVER_CONFIG
+
+Xbee = xbeeController()
+
+
+def joined(frames):
+    return bytes(b for frame in frames for b in frame)
+
+
+def test_nd_reply_with_7e_in_it():
+    frames = [ ndReply("0013A2007E7E0001", "RX 7E", 0x7e7e), ndReply("0013A20000000002", "PT", 0x0010) ]
+    data = joined(frames)
+    addresses = {}
+    nodes = Xbee.parseMessageData(len(data), data, addresses)
+    assert nodes == { "0013A2007E7E0001" : "RX 7E", "0013A20000000002" : "PT" }
+    assert addresses == { "0013A2007E7E0001" : 0x7e7e, "0013A20000000002" : 0x0010 }
+
+
+# a damaged frame is left out, it doesn't turn into a node that isn't there
+def test_nd_reply_damaged():
+    good = ndReply("0013A20000000001", "RX 001", 0x0101)
+    bad = list(ndReply("0013A20000000002", "RX 002", 0x0102))
+    bad[12] ^= 0x04
+    data = joined([bad, good])
+    addresses = {}
+    assert Xbee.parseMessageData(len(data), data, addresses) == { "0013A20000000001" : "RX 001" }
+    assert addresses == { "0013A20000000001" : 0x0101 }
+
+
+# only ND answers are nodes, not other AT replies or receiver frames
+def test_nd_only():
+    other = finish([0x88, 0x01, ord('N'), ord('I'), 0x00] + [0x41] * 20)
+    reply = rxFrame(0x0101, [0x00, RECEIVER_CONFIG] + [0] * 28)
+    data = joined([other, reply])
+    assert Xbee.parseMessageData(len(data), data) == {}
+
+
+def test_receiver_reply_with_7e_in_it():
+    reply = rxFrame(0x017e, [0x00, RECEIVER_CONFIG] + [0x7e] * 28)
+    data = joined([ndReply("0013A20000000001", "RX", 0x7e01), reply])
+    assert Xbee.parseReturnData(len(data), data, RECEIVER_CONFIG) == list(reply)
+
+    damaged = list(reply)
+    damaged[20] ^= 0x01
+    assert Xbee.parseReturnData(len(damaged), damaged, RECEIVER_CONFIG) == []
@@ -0,0 +1,39 @@
+##
+## The transmit scheduler and the transactions on top of it
+##
+
+import asyncio
+
+from ptapp.xbeelink import txScheduler, CONTROL, CONFIG, BULK, DISCOVERY
+
+
+def frame(n, size=16):
+    return bytes([0x7e, 0, size - 4] + [n] * (size - 3))
+
+
+# everything queued at once goes out highest class first, in order within a class
+def test_priority_order():
+    writes = []
+    scheduler = txScheduler(lambda data: writes.append(data))
+    scheduler.packetSize = 16                    # one frame per transfer, so the order shows
+
+    async def run():
+        await asyncio.gather(
+            scheduler.sendAll([frame(1), frame(2)], DISCOVERY),
+            scheduler.sendAll([frame(3), frame(4)], BULK),
+            scheduler.send(frame(5), CONFIG),
+            scheduler.send(frame(6), CONTROL),
+        )
+    asyncio.run(run())
+    assert [data[3] for data in writes] == [6, 5, 3, 4, 1, 2]
+
+
+# frames queued together are joined up into full USB transfers
+def test_frames_share_transfers():
+    writes = []
+    scheduler = txScheduler(lambda data: writes.append(data))
+
+    async def run():
+        await scheduler.sendAll([frame(n) for n in range(8)], CONTROL)
+    asyncio.run(run())
+    assert [len(data) for data in writes] == [64, 64]
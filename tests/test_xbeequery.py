@@ -0,0 +1,58 @@
+##
+## Discovery and device probing on the emulated network
+##
+
+import asyncio
+
+from ptapp.xbeequery import probeTransaction, discoverNodes, PROBE_DEADLINE
+from ptapp.devicecache import RECEIVER, PROTOTHROTTLE
+from ptapp.pttransfer import PT_BLOCK_SIZE
+
+from emulator import rxFrame
+from conftest import PT_MAC, PT_MY
+
+
+def test_discover(network):
+    net = network(receivers=5)
+    assert any(0x7e in (device.my >> 8, device.my & 0xff) for device in net.receivers)
+    data = asyncio.run(net.link.transact("discover", lambda tx: discoverNodes(tx, 1.2)))
+    addresses = {}
+    nodes = net.Xbee.parseMessageData(len(data), data, addresses)
+    assert nodes == { device.mac : device.nodeid for device in net.dongle.devices }
+    assert addresses == { device.mac : device.my for device in net.dongle.devices }
+
+
+def test_probe(network):
+    net = network(receivers=3)
+
+    async def run():
+        for receiver in net.receivers:
+            devtype, reply = await net.link.transact("probe", lambda tx: probeTransaction(tx, net.Xbee, receiver.mac, None, receiver.my))
+            assert devtype == RECEIVER
+            assert list(reply[10:-1]) == receiver.configBytes()
+
+        devtype, header = await net.link.transact("probe", lambda tx: probeTransaction(tx, net.Xbee, PT_MAC, None, PT_MY))
+        assert devtype == PROTOTHROTTLE
+        assert bytes(header) == net.pt.slot(1)[:PT_BLOCK_SIZE]
+    asyncio.run(run())
+
+
+# the PT answers every probe's broadcast read straight away, a receiver that takes
+# longer than that to answer is still a receiver, whether or not we know its MY
+def test_probe_slow_receiver(network):
+    net = network(receivers=1)
+    receiver = net.receivers[0]
+    answer = receiver.directed
+
+    def slowly(payload):
+        for reply in answer(payload):
+            net.dongle.deliver(rxFrame(receiver.my, reply), 0.6)
+        return []
+    receiver.directed = slowly
+
+    async def run():
+        for my in (receiver.my, None):
+            devtype, reply = await net.link.transact("probe", lambda tx: probeTransaction(tx, net.Xbee, receiver.mac, None, my), PROBE_DEADLINE)
+            assert devtype == RECEIVER
+    asyncio.run(run())
+    assert net.pt.requests['R'] == 2
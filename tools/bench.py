@@ -0,0 +1,157 @@
+##
+## Micro-benchmarks for the protocol code, building frames and picking apart replies
+##
+## Runs headless, no toga, Android or dongle needed, and isn't part of the app. With
+## the directory the ptapp package is in on PYTHONPATH (src in the briefcase project):
+##
+##    python tools/bench.py              time everything, compare with the last saved run
+##    python tools/bench.py --save       and add this run to the results file
+##
+## Results are kept one JSON line per run, microseconds per call for each case, so a
+## change that slows down a hot path shows up against the run before it.
+##
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import timeit
+
+from ptapp.xbee import xbeeController
+from ptapp.receiverids import RETURNTYPE
+from ptapp.xbeequery import RECEIVER_CONFIG
+from emulator import ndReply, rxFrame, mrbusPacket, PT_ADDRESS
+
+RESULTS_FILE = "bench_results.jsonl"
+REPEATS      = 5                  # best of this many timing batches
+SLOWER       = 1.10               # flag a case that takes this much longer than last time
+
+RECEIVER_MAC = "0013A20041B2C3D4"
+
+
+##
+## Realistic reads from the dongle, built the way the emulated devices answer.
+## Any byte can turn up anywhere past a frame's start, 0x7e included, the
+## parsers cut frames by their length field
+##
+
+def randomBytes(rng, count):
+    return [rng.randrange(256) for i in range(count)]
+
+def randomMac(rng):
+    return "0013A200" + "".join("{:02X}".format(b) for b in randomBytes(rng, 4))
+
+def ndBurst(rng, nodeids):
+    return joined([ndReply(randomMac(rng), nodeid, rng.randrange(0xfffe), rng.randrange(0x20, 0x60)) for nodeid in nodeids])
+
+# PT answering an 'R' request, 'r', the EE address echoed and the data
+def ptReply(xbee, rng, address, length):
+    return rxFrame(0xfffe, mrbusPacket(xbee, 154, PT_ADDRESS, [ord('r'), address & 0xff, address >> 8] + randomBytes(rng, length)))
+
+# receiver config reply, what displayMainWidgetScreen is built from
+def receiverReply(rng):
+    return rxFrame(0xfffe, [0x00, RECEIVER_CONFIG] + randomBytes(rng, 28))
+
+def joined(frames):
+    data = bytearray()
+    for frame in frames:
+        data.extend(frame)
+    return data
+
+
+##
+## The cases, name -> function taking no arguments
+##
+
+def cases():
+    xbee = xbeeController()
+    rng  = random.Random(1)
+    dest = xbee.buildAddress(RECEIVER_MAC)
+
+    query   = chr(RETURNTYPE) + "000000000000000000"
+    write   = list(range(12))
+    request = xbee.ptWriteRequest(0x0180, write)
+
+    nd30    = ndBurst(rng, ["NODE%02d" % n for n in range(30)])
+    nd200   = ndBurst(rng, ["RX LOCO %03d" % n for n in range(200)])
+    ptread  = joined([ptReply(xbee, rng, 0x80 + 12 * n, 12) for n in range(6)])
+    config  = ndBurst(rng, ["LATE ND"]) + bytearray(receiverReply(rng))
+    single  = bytearray(receiverReply(rng))
+
+    def readReplies():
+        for msg in xbee.splitFrames(len(ptread), ptread):
+            xbee.parsePtReply(msg)
+
+    return {
+        "buildXbeeTransmitData receiver query" : lambda: xbee.buildXbeeTransmitData(dest, query),
+        "xbeeBroadCastRequest PT read"         : lambda: xbee.xbeeBroadCastRequest(48, 154, [ord('R'), 0x80, 0x00, 12]),
+        "xbeeBroadCastRequest PT write 12"     : lambda: xbee.xbeeBroadCastRequest(48, 154, [ord('W'), 0x80, 0x01] + write),
+        "xbeeTransmitRemoteCommand NI"         : lambda: xbee.xbeeTransmitRemoteCommand(dest, 'N', 'I', "RX LOCO 123"),
+        "mrbusCRC16Calculate PT write"         : lambda: xbee.mrbusCRC16Calculate(request[8:]),
+        "getPacket receiver reply"             : lambda: xbee.getPacket(single),
+        "parseMessageData ND burst 30"         : lambda: xbee.parseMessageData(len(nd30), nd30),
+        "parseMessageData ND burst 200"        : lambda: xbee.parseMessageData(len(nd200), nd200),
+        "parseReturnData receiver reply"       : lambda: xbee.parseReturnData(len(config), config, RECEIVER_CONFIG),
+        "parseReturnData 6 PT replies"         : lambda: xbee.parseReturnData(len(ptread), ptread, RECEIVER_CONFIG),
+        "splitFrames/parsePtReply 6 PT replies" : readReplies,
+    }
+
+# best time per call in microseconds
+def timeCase(fn):
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    return min(timer.repeat(REPEATS, number)) / number * 1e6
+
+def lastRun(filename):
+    try:
+       with open(filename) as f:
+          lines = [line for line in f if line.strip()]
+    except OSError:
+       return None
+    if not lines:
+       return None
+    return json.loads(lines[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the Xbee/MRBus frame code")
+    parser.add_argument("--results", default=RESULTS_FILE, help="JSON lines file of earlier runs")
+    parser.add_argument("--save", action="store_true", help="add this run to the results file")
+    parser.add_argument("--only", default="", help="just the cases with this in their name")
+    args = parser.parse_args(argv)
+
+    previous = lastRun(args.results)
+    before = {} if previous == None else previous["results"]
+
+    results = {}
+    for name, fn in cases().items():
+        if args.only not in name:
+           continue
+        results[name] = timeCase(fn)
+        line = "{:<40s} {:10.2f} us".format(name, results[name])
+        if name in before:
+           change = results[name] / before[name]
+           line = line + "  {:+6.1f}%".format((change - 1) * 100)
+           if change > SLOWER:
+              line = line + "  SLOWER"
+        print (line)
+
+    if args.save:
+       run = {
+           "time"     : time.strftime("%Y-%m-%dT%H:%M:%S"),
+           "python"   : platform.python_version(),
+           "machine"  : platform.machine(),
+           "results"  : results,
+       }
+       folder = os.path.dirname(args.results)
+       if folder:
+          os.makedirs(folder, exist_ok=True)
+       with open(args.results, "a") as f:
+          f.write(json.dumps(run) + "\n")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,498 @@
+##
+## Emulated Xbee network, a CP210x dongle with receivers and Protothrottles on the
+## air around it, so the link code can be run on a desktop with no radio
+##
+## emulatedDongle has the calls the app makes on a cp210xPort, write, read and purge,
+## so it drops in under a txScheduler and xbeeLink. Frames written to it go out to
+## the devices, and their answers come back through read() once they have crossed
+## the air. airFaults decides what happens on the way, in both directions.
+##
+## Frames are API mode 1, no escapes, the same as the dongle is set up for.
+## Used by the tools here and the tests, it isn't part of the app.
+##
+
+import collections
+import heapq
+import random
+import threading
+import time
+
+from ptapp.xbee import xbeeController
+from ptapp.pttransfer import PT_SLOT_SIZE, PT_BLOCK_SIZE
+from ptapp.receiverids import RETURNTYPE, RETURNNOTCHES, GETPHYSICS, adprot
+from ptapp.receiverids import SETBASEADDRESS, SETPROTOADDRESS, SETLOCOADDRESS, SETCONSISTADDRESS, SETCONSISTDIRECTION
+from ptapp.receiverids import SETSERVOCONFIG, SETSERVOMODE, SETTIMEOUT, SETOUTPUTSMODE, SETDCCPASSTHRU, SETDCCADDRESS
+from ptapp.receiverids import SETACCELERATION, SETDECELERATION, SETBRAKERATE, SETBRAKEFUNCTION, SETNOTCHMASK, FACTORYRESET
+from ptapp.xbeequery import RECEIVER_CONFIG, RECEIVER_PHYSICS
+
+READ_SIZE  = 256                    # bytes per USB read, the CP210x read buffer
+ND_SPREAD  = 1.0                    # seconds radios spread their ND answers over, they back off at random
+PT_ADDRESS = 48                     # MRBus address the app sends PT requests to
+PT_SOURCE  = 154                    # and the address it sends them from
+PT_SLOTS   = 20                     # slots a throttle has, the app only uses the first PT_MAX_SLOTS
+
+
+##
+## Frame building, the answers the devices send
+##
+
+def checksum(frame):
+    return (0xff - (sum(frame[3:]) & 0xff)) & 0xff
+
+# wrap an API frame body in start, length and checksum
+def finish(body):
+    frame = [0x7e, (len(body) >> 8) & 0xff, len(body) & 0xff] + list(body)
+    frame.append(checksum(frame))
+    return frame
+
+def macBytes(mac):
+    return [int(mac[i:i+2], 16) for i in range(0, 16, 2)]
+
+def macString(data):
+    return "".join("{:02X}".format(b) for b in data)
+
+# local AT 'ND' reply for one remote radio, MY, SH/SL, signal strength, node id and its 0 terminator
+def ndReply(mac, nodeid, my=0xfffe, strength=0x28):
+    return finish([0x88, 0x01, ord('N'), ord('D'), 0x00, my >> 8, my & 0xff] + macBytes(mac)
+                  + [strength] + [ord(c) for c in nodeid] + [0])
+
+# 16 bit address RX frame, source address, RSSI and options ahead of the payload
+def rxFrame(src, payload, rssi=0x28):
+    return finish([0x81, src >> 8, src & 0xff, rssi, 0x00] + list(payload))
+
+# remote AT command response, status 0 is OK
+def remoteAtReply(frameid, mac, my, command, status=0):
+    return finish([0x97, frameid] + macBytes(mac) + [my >> 8, my & 0xff, ord(command[0]), ord(command[1]), status])
+
+# MRBus packet with its CRC filled in, the same layout xbeeBroadCastRequest sends
+def mrbusPacket(xbee, dest, src, data):
+    packet = [dest, src, len(data) + 5, 0, 0] + list(data)
+    crc = xbee.mrbusCRC16Calculate(packet)
+    packet[3] = crc & 0xff
+    packet[4] = (crc >> 8) & 0xff
+    return packet
+
+
+##
+## What the air does to frames, both ways. Delays are seconds, the rest are chances
+## per frame. A frame the devices get corrupted fails the radio checksum and is
+## dropped, one the dongle gets corrupted is handed over as it is, like a real dongle
+##
+
+class airFaults:
+    def __init__(self, latency=0.005, jitter=0.0, loss=0.0, duplicate=0.0, corrupt=0.0, seed=None):
+        self.latency   = latency
+        self.jitter    = jitter
+        self.loss      = loss
+        self.duplicate = duplicate
+        self.corrupt   = corrupt
+        self.rng       = random.Random(seed)
+        self.lock      = threading.Lock()       # reads and writes come from different threads
+
+    def delay(self):
+        with self.lock:
+           return self.latency + self.rng.uniform(0, self.jitter)
+
+    def spread(self, seconds):
+        with self.lock:
+           return self.rng.uniform(0, seconds)
+
+    def chance(self, p):
+        if p <= 0:
+           return False
+        with self.lock:
+           return self.rng.random() < p
+
+    # flip one bit somewhere past the start byte
+    def damage(self, frame):
+        frame = list(frame)
+        with self.lock:
+           i = self.rng.randrange(1, len(frame))
+           frame[i] = frame[i] ^ (1 << self.rng.randrange(8))
+        return frame
+
+
+##
+## A radio on the network. Devices get the payload of frames meant for them and
+## return the payloads they answer with, the dongle does the framing
+##
+
+class emulatedDevice:
+    def __init__(self, mac, nodeid, my=0xfffe):
+        self.mac    = mac
+        self.nodeid = nodeid
+        self.my     = my                 # 16 bit address, 0xfffe if it only has its MAC
+
+    # payload of a 64 bit addressed transmit to this radio
+    def directed(self, payload):
+        return []
+
+    # MRBus packet broadcast to everyone
+    def broadcast(self, packet):
+        return []
+
+    # remote AT command, True if the radio took it
+    def atCommand(self, command, value):
+        if command == "NI":
+           self.nodeid = "".join(chr(b) for b in value)
+           return True
+        return command in ("AC", "WR")
+
+
+##
+## Protothrottle EEPROM, the config block at 0 then a 128 byte slot per locomotive,
+## the first two bytes of a slot are its loco address. Answers MRBus 'R' with 'r',
+## the EE address echoed ahead of the data, and takes 'W' without answering.
+##
+## The fault modes copy what real throttles do, all off to start with
+##
+##  maxChunk    - longest read or write the firmware takes, longer ones are ignored
+##  commitDelay - seconds before a write shows in reads, the EEPROM is still writing
+##  duplicates  - chance each reply goes out twice
+##  stallPast   - slot number, a request for anything past it stalls the throttle
+##                for stallTime seconds, it answers nothing at all until then
+##
+
+class emulatedProtothrottle(emulatedDevice):
+    def __init__(self, mac, nodeid, my=0xfffe, seed=None):
+        emulatedDevice.__init__(self, mac, nodeid, my)
+        self.Xbee = xbeeController()
+        self.rng  = random.Random(seed)
+        self.ee   = bytearray(self.rng.randrange(256) for i in range(PT_SLOT_SIZE * (PT_SLOTS + 1)))
+        for sid in range(1, PT_SLOTS + 1):
+            loco = self.rng.randrange(1, 10000)
+            self.ee[sid*PT_SLOT_SIZE]   = loco & 0xff
+            self.ee[sid*PT_SLOT_SIZE+1] = loco >> 8
+
+        self.maxChunk    = PT_BLOCK_SIZE
+        self.commitDelay = 0
+        self.duplicates  = 0
+        self.stallPast   = None
+        self.stallTime   = 5.0
+
+        self.pending = []                # (due, address, data) written but not in the EEPROM yet
+        self.stalledUntil = 0
+        self.requests = collections.Counter()    # 'R' and 'W' packets that got through to us
+
+    def slot(self, sid):
+        return bytes(self.ee[sid*PT_SLOT_SIZE:(sid+1)*PT_SLOT_SIZE])
+
+    def setSlot(self, sid, data):
+        self.ee[sid*PT_SLOT_SIZE:sid*PT_SLOT_SIZE+len(data)] = bytes(data)
+
+    # writes whose time has come go into the EEPROM, in the order they were made
+    def commit(self, now):
+        while self.pending and self.pending[0][0] <= now:
+            due, address, data = self.pending.pop(0)
+            self.ee[address:address+len(data)] = data
+
+    def commitAll(self):
+        self.commit(float("inf"))
+
+    def broadcast(self, packet):
+        now = time.monotonic()
+        self.commit(now)
+        if now < self.stalledUntil:
+           return []
+        if len(packet) < 8 or packet[0] not in (PT_ADDRESS, 0xff):
+           return []
+        if self.Xbee.mrbusCRC16Calculate(packet) != packet[3] | (packet[4] << 8):
+           return []
+        command = chr(packet[5])
+        address = packet[6] | (packet[7] << 8)
+        self.requests[command] += 1
+
+        if self.stallPast != None and address >= (self.stallPast + 1) * PT_SLOT_SIZE:
+           self.stalledUntil = now + self.stallTime
+           return []
+
+        if command == 'R':
+           length = packet[8]
+           if length > self.maxChunk or address + length > len(self.ee):
+              return []
+           reply = mrbusPacket(self.Xbee, packet[1], PT_ADDRESS, [ord('r'), packet[6], packet[7]] + list(self.ee[address:address+length]))
+           if self.duplicates > 0 and self.rng.random() < self.duplicates:
+              return [reply, reply]
+           return [reply]
+
+        if command == 'W':
+           data = bytes(packet[8:packet[2]])
+           if len(data) <= self.maxChunk and address + len(data) <= len(self.ee):
+              self.pending.append((now + self.commitDelay, address, data))
+              self.commit(now)
+        return []
+
+
+##
+## Dead Rail receiver, keeps its settings the way it reports them and takes the
+## SET commands the screens send. Each answer is 0x00, the reply code and 28 bytes,
+## byte i of those is message[10+i] to the screens
+##
+##  config  - base, PT address, loco and consist addresses, consist direction, the
+##            three servos' low and high limits, servo mode, servo 1 and 2 functions,
+##            reverse bits, timeout, DCC passthru, then outputs X and Y as fn | state<<7
+##  physics - brake rate, acceleration and deceleration, 16 bits each, brake function
+##  notches - notch mask, then in low, in high and output for each of the 8 notches
+##
+## SET commands get no answer, the app reads the screen back to see them. The
+## acceleration, deceleration and brake function senders are still empty in the
+## app, these take them the way SETBRAKERATE is sent, three digits ones first
+##
+
+RECEIVER_NOTCHES = 8
+ADDRESS_LETTERS  = { letter : key for key, letter in adprot.items() }
+
+
+class emulatedReceiver(emulatedDevice):
+    def __init__(self, mac, nodeid, my=0xfffe, seed=None):
+        emulatedDevice.__init__(self, mac, nodeid, my)
+        self.factoryReset()
+        rng = random.Random(seed)
+        self.base       = rng.randrange(10)
+        self.ptAddress  = rng.choice(list(adprot))
+        self.loco       = rng.randrange(1, 10000)
+        self.servos     = [ [rng.randrange(900, 1400), rng.randrange(1600, 2100), rng.randrange(29)] for n in range(3) ]
+        self.reverse    = rng.randrange(8)
+        self.outputs    = [ [rng.randrange(29), rng.randrange(2)] for n in range(2) ]
+        self.brakeRate  = rng.randrange(1000)
+        self.accel      = rng.randrange(1000)
+        self.decel      = rng.randrange(1000)
+        self.brakeFunction = rng.randrange(29)
+        self.notches    = [ [rng.randrange(256), rng.randrange(256), rng.randrange(256)] for n in range(RECEIVER_NOTCHES) ]
+        self.requests   = collections.Counter()    # command codes that got through to us
+
+    def factoryReset(self):
+        self.base       = 0
+        self.ptAddress  = 0x30                   # 'A'
+        self.loco       = 3
+        self.consist    = 0
+        self.consistDir = 0                      # 0 off, 1 forward, 2 reverse
+        self.servos     = [ [1000, 2000, 0] for n in range(3) ]    # low, high, function
+        self.servoMode  = 0
+        self.reverse    = 0                      # bit per servo
+        self.timeout    = 0
+        self.passthru   = 0
+        self.dccAddress = 3
+        self.outputs    = [ [0, 0], [0, 0] ]     # X and Y, function and state
+        self.brakeRate  = 0
+        self.accel      = 0
+        self.decel      = 0
+        self.brakeFunction = 0
+        self.notchMask  = 0
+        self.notches    = [ [0, 0, 0] for n in range(RECEIVER_NOTCHES) ]
+
+    def configBytes(self):
+        data = [self.base, self.ptAddress] + word(self.loco) + word(self.consist) + [self.consistDir]
+        for low, high, function in self.servos:
+            data.extend(word(low) + word(high))
+        data.extend([self.servoMode, self.servos[1][2], self.servos[2][2], self.reverse, self.timeout, self.passthru])
+        data.extend([function | (state << 7) for function, state in self.outputs])
+        return padded(data)
+
+    def physicsBytes(self):
+        return padded(word(self.brakeRate) + word(self.accel) + word(self.decel) + [self.brakeFunction])
+
+    def notchesBytes(self):
+        data = [self.notchMask]
+        for notch in self.notches:
+            data.extend(notch)
+        return padded(data)
+
+    def directed(self, payload):
+        if not payload:
+           return []
+        command = payload[0]
+        self.requests[command] += 1
+        if command == RETURNTYPE:
+           return [ [0x00, RECEIVER_CONFIG] + self.configBytes() ]
+        if command == RETURNNOTCHES:
+           return [ [0x00, RECEIVER_CONFIG] + self.notchesBytes() ]
+        if command == GETPHYSICS:
+           return [ [0x00, RECEIVER_PHYSICS] + self.physicsBytes() ]
+        try:
+           self.setting(command, payload)
+        except (ValueError, IndexError):
+           pass                                  # garbled, the receiver ignores it
+        return []
+
+    # the SET commands, laid out as receiverscreen and servoscreen send them
+    def setting(self, command, payload):
+        if command == SETPROTOADDRESS:
+           c = chr(payload[1])
+           self.ptAddress = ADDRESS_LETTERS[c] if c in ADDRESS_LETTERS else payload[1]
+        elif command == SETBASEADDRESS:
+           self.base = payload[1]
+        elif command == SETLOCOADDRESS:
+           self.loco = digits(payload, 1, 4)
+        elif command == SETCONSISTADDRESS:
+           self.consist = digits(payload, 1, 4)
+        elif command == SETCONSISTDIRECTION:
+           self.consistDir = payload[1]
+        elif command == SETDCCPASSTHRU:
+           self.passthru = payload[1]
+        elif command == SETDCCADDRESS:
+           self.dccAddress = digits(payload, 1, 4)
+        elif command == SETTIMEOUT:
+           self.timeout = payload[1]
+        elif command == SETOUTPUTSMODE:
+           self.outputs[0 if payload[1] == 1 else 1] = [payload[2] & 0x7f, payload[3] & 0x01]
+        elif command == SETSERVOCONFIG:
+           num = digits(payload, 1, 1)
+           bit = 1 << num
+           self.servos[num] = [digits(payload, 6, 4), digits(payload, 2, 4), digits(payload, 11, 2)]
+           self.reverse = (self.reverse | bit) if payload[10] == ord('1') else (self.reverse & ~bit)
+        elif command == SETSERVOMODE:
+           self.servoMode = payload[1]
+        elif command == SETBRAKERATE:
+           self.brakeRate = backwards(payload, 1, 3)
+        elif command == SETACCELERATION:
+           self.accel = backwards(payload, 1, 3)
+        elif command == SETDECELERATION:
+           self.decel = backwards(payload, 1, 3)
+        elif command == SETBRAKEFUNCTION:
+           self.brakeFunction = backwards(payload, 1, 3)
+        elif command == SETNOTCHMASK:
+           self.notchMask = payload[1]
+        elif command == FACTORYRESET:
+           self.factoryReset()
+
+def word(value):
+    return [value & 0xff, (value >> 8) & 0xff]
+
+def padded(data):
+    return (list(data) + [0] * 28)[:28]
+
+# ascii decimal digits in the payload
+def digits(payload, start, count):
+    return int("".join(chr(b) for b in payload[start:start+count]))
+
+def backwards(payload, start, count):
+    return int("".join(chr(b) for b in reversed(payload[start:start+count])))
+
+# 16 bit MY addresses from first up. The default starts just under 0x017e so even a
+# small fleet has one with 0x7e, the frame start byte, in it, parsers have to cope
+def myAddresses(count, first=0x017c):
+    return list(range(first, first + count))
+
+# receivers with their own MAC and MY address each, for a layout's worth of them on one dongle
+def receiverFleet(count, seed=None):
+    rng = random.Random(seed)
+    serials = rng.sample(range(1 << 32), count)
+    return [ emulatedReceiver("0013A200%08X" % serial, "RX %03d" % n, my, seed=rng.random()) for n, (serial, my) in enumerate(zip(serials, myAddresses(count))) ]
+
+
+##
+## The dongle. write() is called on the event loop, read() from the link's worker
+## thread, so everything they share is under the condition's lock
+##
+
+class emulatedDongle:
+    def __init__(self, devices, faults=None):
+        self.Xbee    = xbeeController()
+        self.devices = list(devices)
+        self.faults  = faults if faults != None else airFaults()
+        self.ready   = threading.Condition()
+        self.air     = []               # heap of (due, seq, frame) on the way to the dongle
+        self.seq     = 0
+        self.rx      = bytearray()      # arrived, waiting to be read
+        self.sent    = collections.Counter()    # frames the app wrote, by kind, ND, R, W, TX64, AT
+
+    def packetSize(self):
+        return 64
+
+    def write(self, data):
+        for frame in self.Xbee.splitFrames(len(data), data):
+            self.count(frame)
+            if self.faults.chance(self.faults.loss) or self.faults.chance(self.faults.corrupt):
+               continue                 # lost, or garbled and thrown out by the radio
+            self.transmit(frame)
+        return True
+
+    def count(self, frame):
+        if len(frame) < 4:
+           return
+        kind = frame[3]
+        if kind == 0x08:
+           self.sent["ND"] += 1
+        elif kind == 0x01 and len(frame) > 13:
+           self.sent[chr(frame[13])] += 1
+        elif kind == 0x00:
+           self.sent["TX64"] += 1
+        elif kind == 0x17:
+           self.sent["AT"] += 1
+
+    def transmit(self, frame):
+        kind = frame[3]
+
+        if kind == 0x08 and frame[5:7] == [ord('N'), ord('D')]:
+           for device in self.devices:
+               self.deliver(ndReply(device.mac, device.nodeid, device.my), self.faults.spread(ND_SPREAD))
+
+        elif kind == 0x00 and len(frame) > 15:
+           device = self.find(macString(frame[5:13]))
+           if device != None:
+              for payload in device.directed(frame[14:-1]):
+                  self.deliver(rxFrame(device.my, payload))
+
+        elif kind == 0x01 and len(frame) > 9:
+           dest = (frame[5] << 8) | frame[6]
+           for device in self.devices:
+               if dest == 0xffff or dest == device.my:
+                  for payload in device.broadcast(frame[8:-1]):
+                      self.deliver(rxFrame(device.my, payload))
+
+        elif kind == 0x17 and len(frame) > 18:
+           device = self.find(macString(frame[5:13]))
+           if device != None:
+              command = chr(frame[16]) + chr(frame[17])
+              status = 0 if device.atCommand(command, frame[18:-1]) else 2
+              if frame[4] != 0:
+                 self.deliver(remoteAtReply(frame[4], device.mac, device.my, command, status))
+
+    def find(self, mac):
+        for device in self.devices:
+            if device.mac == mac:
+               return device
+        return None
+
+    # put a frame on the air back to the dongle
+    def deliver(self, frame, extra=0):
+        faults = self.faults
+        if faults.chance(faults.loss):
+           return
+        copies = 2 if faults.chance(faults.duplicate) else 1
+        for copy in range(copies):
+            damaged = faults.damage(frame) if faults.chance(faults.corrupt) else frame
+            with self.ready:
+               self.seq = self.seq + 1
+               heapq.heappush(self.air, (time.monotonic() + extra + faults.delay(), self.seq, bytes(damaged)))
+               self.ready.notify_all()
+
+    # everything whose time has come moves from the air to the dongle, call with the lock held
+    def arrive(self, now):
+        while self.air and self.air[0][0] <= now:
+            self.rx.extend(heapq.heappop(self.air)[2])
+
+    # blocks up to timeout ms, like a bulk transfer
+    def read(self, timeout=250):
+        ends = time.monotonic() + timeout / 1000
+        with self.ready:
+           while True:
+               now = time.monotonic()
+               self.arrive(now)
+               if self.rx:
+                  data = bytes(self.rx[:READ_SIZE])
+                  del self.rx[:READ_SIZE]
+                  return data
+               wait = ends - now
+               if self.air:
+                  wait = min(wait, self.air[0][0] - now)
+               if wait <= 0 and now >= ends:
+                  return bytes()
+               self.ready.wait(max(wait, 0.0005))
+
+    # frames already at the dongle go, ones still in the air turn up later as stale replies
+    def purge(self):
+        with self.ready:
+           self.arrive(time.monotonic())
+           self.rx = bytearray()
@@ -0,0 +1,282 @@
+##
+## Replay a captured session, each transaction in a trace (Trace button, or
+## soak.py --trace) runs again, the same job the app ran, discoverNodes,
+## probeTransaction, receiverQuery or a ptTransfer read or write window, on a link
+## whose reads hand back what the dongle returned the first time
+##
+## Runs headless, with the directory the ptapp package is in on PYTHONPATH:
+##
+##    python tools/replay.py trace.jsonl                  as fast as it goes
+##    python tools/replay.py trace.jsonl --timing         reads turn up when they did
+##    python tools/replay.py trace.jsonl --save out.jsonl keep what got decoded
+##    python tools/replay.py trace.jsonl --expect out.jsonl  and check a change didn't alter it
+##
+## The same capture always decodes the same way, so one from a problem layout is a
+## fixture, --expect exits 1 if anything decodes differently from the saved run.
+## It also exits 1 if the capture has transactions there's no job for, like receiver
+## commands that aren't queries, since nothing checked those. Frames sent outside a
+## transaction, the screens' setting writes, have no reads to check and are only counted.
+## A job that sends something other than the capture did, or is done before it has
+## used up the capture's reads, no longer matches what happened, those are reported too.
+##
+
+import argparse
+import asyncio
+import collections
+import json
+import sys
+import time
+
+from ptapp.xbee import xbeeController
+from ptapp.xbeelink import xbeeLink
+from ptapp.xbeequery import discoverNodes, probeTransaction, receiverQuery, QUERY_REPLIES
+from ptapp.pttransfer import ptTransfer
+from ptapp.devicecache import RECEIVER
+from ptapp.frametrace import loadTrace, TRACE_START, TRACE_END, TRACE_TX, TRACE_READ
+
+
+# the capture has no more reads for this transaction, the original stopped here at its deadline
+class captureEnded(Exception):
+    pass
+
+
+# takes the frames the jobs send and keeps them, nothing goes anywhere
+class replayScheduler:
+    def __init__(self):
+        self.online = asyncio.Event()
+        self.online.set()
+        self.queues = {}
+        self.trace  = None
+        self.sent   = []
+
+    async def send(self, frame, priority=None, tag=None):
+        self.sent.append(bytes(frame))
+
+    async def sendAll(self, frames, priority=None, tag=None):
+        for frame in frames:
+            self.sent.append(bytes(frame))
+
+
+##
+## The link, read() returns the current transaction's captured reads in order and
+## time is the capture's, now() is when the last read came back and pauses take none
+##
+
+class replayLink(xbeeLink):
+    def __init__(self, xbee, timing=False):
+        xbeeLink.__init__(self, xbee, replayScheduler(), self.readCapture)
+        self.timing   = timing
+        self.chunks   = collections.deque()    # (ms, bytes) still to hand out
+        self.clock    = 0
+        self.base     = 0                      # capture ms and perf_counter when the transaction started
+        self.started  = 0
+        self.readTime = 0                      # seconds spent handing out reads, waits in --timing included
+
+    def load(self, begin, reads):
+        self.chunks   = collections.deque(reads)
+        self.clock    = begin / 1000
+        self.base     = begin
+        self.started  = time.perf_counter()
+        self.scheduler.sent = []
+
+    def now(self):
+        return self.clock
+
+    async def pause(self, seconds):
+        pass
+
+    def readCapture(self, timeout):
+        started = time.perf_counter()
+        if not self.chunks:
+           raise captureEnded()
+        ms, data = self.chunks.popleft()
+        if self.timing:
+           wait = self.started + (ms - self.base) / 1000 - time.perf_counter()
+           if wait > 0:
+              time.sleep(wait)
+        self.clock = ms / 1000
+        self.readTime += time.perf_counter() - started
+        return data
+
+
+# the frames a transaction sent that were MRBus requests with command cmd
+def mrbusFrames(sent, cmd):
+    return [f for f in sent if len(f) > 16 and f[3] == 0x01 and f[13] == ord(cmd)]
+
+# the receiver a transaction talked to and the command it sent, from its first 64 bit transmit
+def receiverCommand(sent):
+    for f in sent:
+        if len(f) > 14 and f[3] == 0x00:
+           return "".join("{:02X}".format(b) for b in f[5:13]), f[14]
+    return None, None
+
+def hexed(data):
+    return None if data == None else bytes(data).hex()
+
+
+class sessionReplay:
+    def __init__(self, timing=False):
+        self.Xbee    = xbeeController()
+        self.link    = replayLink(self.Xbee, timing)
+        self.engine  = ptTransfer(self.Xbee, self.link)
+        self.addresses = {}              # mac -> MY from the replayed scans, for the probes
+        self.decoded = []
+        self.reads   = 0
+        self.skipped = collections.Counter()     # transactions there's no job for, by name
+        self.jobTime = collections.Counter()     # seconds per transaction name, reads not counted
+        self.calls   = collections.Counter()
+
+    # the job a transaction ran and what to make of its return value, from its name and what it sent
+    def job(self, name, sent):
+        if name == "discover":
+           def nodes(data):
+               found = {}
+               result = self.Xbee.parseMessageData(len(data), data, found)
+               self.addresses.update(found)
+               return { "nodes" : result, "addresses" : found }
+           return discoverNodes, nodes
+
+        if name == "PT read":
+           window = {}
+           for f in mrbusFrames(sent, 'R'):
+               window[f[14] | (f[15] << 8)] = f[16]
+           results = {}
+           job = lambda tx: self.engine.readWindow(tx, window, results, None)
+           return job, lambda r: { str(a) : hexed(results[a]) for a in sorted(results) }
+
+        if name == "PT write":
+           window = []
+           for f in mrbusFrames(sent, 'W'):
+               address = f[14] | (f[15] << 8)
+               window.append((address, list(f[16:8 + f[10]])))
+           results = {}
+           job = lambda tx: self.engine.writeWindow(tx, window, results)
+           return job, lambda r: { str(a) : hexed(results[a]) for a in sorted(results) }
+
+        mac, command = receiverCommand(sent)
+        if mac == None:
+           return None, None
+
+        if name == "probe":
+           known = None if mrbusFrames(sent, 'R') else RECEIVER
+           my = self.addresses.get(mac)
+           job = lambda tx: probeTransaction(tx, self.Xbee, mac, known, my)
+           return job, lambda r: [r[0], hexed(r[1])]
+
+        if command in QUERY_REPLIES:
+           return (lambda tx: receiverQuery(tx, self.Xbee, mac, command)), hexed
+        return None, None
+
+    async def run(self, txid, name, begin, sent, reads):
+        job, decode = self.job(name, sent)
+        if job == None:
+           self.skipped[name] += 1
+           return
+
+        self.link.load(begin, reads)
+        self.reads = self.reads + len(reads)
+        readTime = self.link.readTime
+        started = time.perf_counter()
+        ended = False
+        try:
+           result = decode(await self.link.transact(name, job))
+        except captureEnded:
+           result = None
+           ended = True
+        self.jobTime[name] += time.perf_counter() - started - (self.link.readTime - readTime)
+        self.calls[name] += 1
+
+        self.decoded.append({
+            "tx"     : txid,
+            "name"   : name,
+            "result" : result,
+            "ended"  : ended,                                  # ran out of reads, the original's deadline
+            "left"   : len(self.link.chunks),                  # reads the replay never got to
+            "same"   : self.link.scheduler.sent == sent,       # sent what the capture did
+        })
+
+
+# transactions in the order they started, (number, name, start ms, frames sent, reads)
+def transactions(entries):
+    found = collections.OrderedDict()
+    for entry in entries:
+        txid = entry["tx"]
+        if entry["dir"] == TRACE_START:
+           found[txid] = [txid, entry["type"], entry["ms"], [], []]
+        elif txid not in found or entry["dir"] == TRACE_END:
+           continue                  # sent outside a transaction, or it started before the capture did
+        elif entry["dir"] == TRACE_TX:
+           found[txid][3].append(entry["data"])
+        elif entry["dir"] == TRACE_READ:
+           found[txid][4].append((entry["ms"], entry["data"]))
+    return list(found.values())
+
+def replay(entries, timing=False):
+    session = sessionReplay(timing)
+
+    async def runAll():
+        for txid, name, begin, sent, reads in transactions(entries):
+            await session.run(txid, name, begin, sent, reads)
+
+    started = time.monotonic()
+    asyncio.run(runAll())
+    return session, time.monotonic() - started
+
+# where the saved and replayed runs first part ways, None if they don't
+def difference(saved, decoded):
+    for n in range(max(len(saved), len(decoded))):
+        before = saved[n] if n < len(saved) else None
+        after  = decoded[n] if n < len(decoded) else None
+        if before != after:
+           return n, before, after
+    return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a captured session's transactions again on its recorded reads")
+    parser.add_argument("trace", help="trace file, JSON lines from the Trace button or soak.py --trace")
+    parser.add_argument("--timing", action="store_true", help="hand out reads as far apart as the capture got them")
+    parser.add_argument("--save", help="write what got decoded to this file")
+    parser.add_argument("--expect", help="decoded file from an earlier run, report any difference")
+    args = parser.parse_args(argv)
+
+    entries = loadTrace(args.trace)
+    session, elapsed = replay(entries, args.timing)
+
+    print ("{} transactions, {} reads".format(len(session.decoded), session.reads))
+    for name in sorted(session.calls):
+        print ("{:<18s} {:7d} runs {:10.1f} us {:8.1f} us/run".format(
+               name, session.calls[name], session.jobTime[name] * 1e6, session.jobTime[name] * 1e6 / session.calls[name]))
+    print ("{:<18s} {:10.1f} ms".format("jobs total", sum(session.jobTime.values()) * 1000))
+    print ("{:<18s} {:10.1f} ms".format("replay", elapsed * 1000))
+    for name in sorted(session.skipped):
+        print ("skipped {} {}, no job to run it with".format(session.skipped[name], name))
+    loose = len([e for e in entries if e["dir"] == TRACE_TX and e["tx"] == None])
+    if loose:
+       print ("{} frames sent outside a transaction, screen writes, not replayed".format(loose))
+
+    diverged = [d for d in session.decoded if d["left"] or not d["same"]]
+    for d in diverged:
+        print ("tx {} {} left {} reads unused{}".format(d["tx"], d["name"], d["left"], "" if d["same"] else ", sent differently"))
+
+    if args.save:
+       with open(args.save, "w") as f:
+          for d in session.decoded:
+              f.write(json.dumps(d) + "\n")
+
+    if args.expect:
+       with open(args.expect) as f:
+          saved = [json.loads(line) for line in f if line.strip()]
+       # json turns the dicts' keys to strings the same way, so compare as json
+       found = difference(saved, [json.loads(json.dumps(d)) for d in session.decoded])
+       if found != None:
+          n, before, after = found
+          print ("decoded differently at {}:\n  was {}\n  now {}".format(n, before, after))
+          return 1
+       if session.skipped:
+          print ("{} transactions weren't replayed, the capture isn't all checked".format(sum(session.skipped.values())))
+          return 1
+       print ("decoded the same as", args.expect)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
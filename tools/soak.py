@@ -0,0 +1,247 @@
+##
+## Soak test, runs the app's link flows over and over against an emulated network
+## with faults on the air, and reports how long they took and how often they failed
+##
+## Runs headless, with the directory the ptapp package is in on PYTHONPATH:
+##
+##    python tools/soak.py --iterations 2000 --loss 0.02 --jitter 0.03 --corrupt 0.005
+##
+## The flows are the ones the app runs, discoverNodes, probeTransaction and the PT
+## transfer engine, on the real scheduler and link, with the app's deadlines.
+## Each lane is its own dongle and network, lanes run side by side so thousands of
+## iterations don't take all day, but each one sees only its own traffic.
+##
+## Retries are requests sent beyond what a clean run needs, so a backup of one slot
+## that had to ask for two blocks again counts 2.
+##
+## commission sets a receiver's loco address the way the receiver screen does and
+## reads it back, trying again if it didn't take. With --receivers in the hundreds
+## it is a layout being set up from scratch.
+##
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import random
+import sys
+import time
+
+from ptapp.xbee import xbeeController
+from ptapp.xbeelink import txScheduler, xbeeLink, linkPool
+from ptapp.xbeequery import *
+from ptapp.pttransfer import *
+from ptapp.devicecache import RECEIVER, PROTOTHROTTLE
+from ptapp.receiverids import SETLOCOADDRESS
+from emulator import *
+from ptapp.frametrace import frameTrace
+
+FLOWS = ["discovery", "config", "backup", "restore", "commission"]
+
+COMMISSION_TRIES = 3
+
+
+##
+## One lane, a dongle with a few receivers and a Protothrottle, and the app's link on it
+##
+
+class soakLane:
+    def __init__(self, number, args):
+        rng = random.Random(args.seed * 1000 + number)
+        self.rng = rng
+        self.receivers = receiverFleet(args.receivers, rng.random())
+        self.pt = emulatedProtothrottle("0013A200%08X" % rng.getrandbits(32), "PT", 0x0010, seed=rng.random())
+        self.pt.commitDelay = args.pt_commit_delay
+        self.pt.duplicates = args.pt_duplicates
+        faults = airFaults(args.latency, args.jitter, args.loss, args.duplicate, args.corrupt, rng.random())
+
+        self.dongle = emulatedDongle(self.receivers + [self.pt], faults)
+        self.Xbee = xbeeController()
+        self.link = linkPool()
+        self.link.add(xbeeLink(self.Xbee, txScheduler(self.dongle.write), self.dongle.read, self.dongle.purge))
+
+    def requests(self, *kinds):
+        return sum(self.dongle.sent[kind] for kind in kinds)
+
+    # each flow returns (ok, bad data, retries)
+
+    async def discovery(self):
+        try:
+           data = await self.link.transact("discover", discoverNodes, DISCOVER_DEADLINE)
+        except asyncio.TimeoutError:
+           return False, False, 0
+        nodes = self.Xbee.parseMessageData(len(data), data)
+        wanted = { device.mac : device.nodeid for device in self.dongle.devices }
+        bad = any(mac in wanted and nodes[mac] != wanted[mac] for mac in nodes) or any(mac not in wanted for mac in nodes)
+        return all(mac in nodes for mac in wanted), bad, 0
+
+    async def config(self):
+        receiver = self.rng.choice(self.receivers)
+        sent = self.requests("TX64", "R")
+        try:
+           devtype, reply = await self.link.transact("probe", lambda tx: probeTransaction(tx, self.Xbee, receiver.mac, None, receiver.my), PROBE_DEADLINE)
+        except asyncio.TimeoutError:
+           return False, False, self.requests("TX64", "R") - sent - 2
+        bad = devtype != RECEIVER or list(reply[10:-1]) != receiver.configBytes()
+        return not bad, bad, self.requests("TX64", "R") - sent - 2
+
+    def engine(self):
+        engine = ptTransfer(self.Xbee, self.link)
+        engine.setDeadline(SLOT_DEADLINE)
+        return engine
+
+    async def backup(self):
+        sid = self.rng.randrange(1, PT_MAX_SLOTS + 1)
+        blocks = len(ptTransfer(self.Xbee, self.link).blockList(sid*PT_SLOT_SIZE, PT_SLOT_SIZE))
+        sent = self.requests("R")
+        data = await self.engine().readRange(sid*PT_SLOT_SIZE, PT_SLOT_SIZE)
+        retries = self.requests("R") - sent - blocks
+        if not data:
+           return False, False, retries
+        bad = bytes(data) != bytes(self.pt.ee[sid*PT_SLOT_SIZE:(sid+1)*PT_SLOT_SIZE])
+        return not bad, bad, retries
+
+    # a slot edited in a few places, restoreImage reads it, then writes and reads back what changed
+    async def restore(self):
+        sid = self.rng.randrange(1, PT_MAX_SLOTS + 1)
+        start = sid*PT_SLOT_SIZE
+        engine = self.engine()
+        image = list(self.pt.ee[start:start+PT_SLOT_SIZE])
+        for n in range(self.rng.randrange(1, 4)):
+            image[self.rng.randrange(PT_SLOT_SIZE)] = self.rng.randrange(256)
+        blocks = len(engine.blockList(start, PT_SLOT_SIZE))
+        changed = len(engine.diffBlocks(start, self.pt.ee[start:start+PT_SLOT_SIZE], image))
+
+        sent = self.requests("R", "W")
+        written = await engine.restoreImage(start, image)
+        retries = self.requests("R", "W") - sent - (blocks + 2 * changed)
+        if written < 0:
+           return False, False, retries
+        self.pt.commitAll()
+        bad = list(self.pt.ee[start:start+PT_SLOT_SIZE]) != image
+        return not bad, bad, retries
+
+    # a new loco address, sent as handle_locoAddress does, then read back with the config query
+    async def commission(self):
+        receiver = self.rng.choice(self.receivers)
+        loco = self.rng.randrange(1, 10000)
+        data = chr(SETLOCOADDRESS) + "%04d" % loco + '567890123456789'
+        sent = self.requests("TX64")
+        for attempt in range(COMMISSION_TRIES):
+            await self.link.send(self.Xbee.buildXbeeTransmitData(self.Xbee.buildAddress(receiver.mac), data))
+            try:
+               devtype, reply = await self.link.transact("probe", lambda tx: probeTransaction(tx, self.Xbee, receiver.mac, RECEIVER, receiver.my), PROBE_DEADLINE)
+            except asyncio.TimeoutError:
+               continue
+            if devtype == RECEIVER and (reply[12] | (reply[13] << 8)) == loco:
+               return True, False, self.requests("TX64") - sent - 2
+        return False, False, self.requests("TX64") - sent - 2
+
+
+##
+## Results for one flow
+##
+
+class flowStats:
+    def __init__(self):
+        self.times    = []
+        self.retries  = []
+        self.failures = 0
+        self.bad      = 0
+
+    def add(self, seconds, ok, bad, retries):
+        self.times.append(seconds)
+        self.retries.append(max(0, retries))
+        if not ok:
+           self.failures = self.failures + 1
+        if bad:
+           self.bad = self.bad + 1
+
+    def percentile(self, p):
+        times = sorted(self.times)
+        return times[min(len(times) - 1, int(p / 100 * len(times)))]
+
+    def summary(self):
+        count = len(self.times)
+        return {
+            "runs"     : count,
+            "failures" : self.failures,
+            "bad data" : self.bad,
+            "p50 ms"   : round(self.percentile(50) * 1000, 1),
+            "p95 ms"   : round(self.percentile(95) * 1000, 1),
+            "p99 ms"   : round(self.percentile(99) * 1000, 1),
+            "retries/op" : round(sum(self.retries) / count, 2),
+            "max retries" : max(self.retries),
+        }
+
+
+async def runLane(lane, work, stats, progress):
+    while work:
+        flow = work.pop()
+        started = time.monotonic()
+        ok, bad, retries = await getattr(lane, flow)()
+        stats[flow].add(time.monotonic() - started, ok, bad, retries)
+        progress()
+
+async def soak(args):
+    flows = args.flows.split(",")
+    for flow in flows:
+        if flow not in FLOWS:
+           raise SystemExit("unknown flow " + flow + ", pick from " + ",".join(FLOWS))
+
+    # every lane has a USB read going in a worker thread most of the time
+    asyncio.get_event_loop().set_default_executor(concurrent.futures.ThreadPoolExecutor(args.lanes + 4))
+
+    work = [flow for n in range(args.iterations) for flow in flows]
+    random.Random(args.seed).shuffle(work)
+    total = len(work)
+    stats = { flow : flowStats() for flow in flows }
+    done = [0]
+
+    def progress():
+        done[0] = done[0] + 1
+        if done[0] % 100 == 0:
+           print ("{}/{}".format(done[0], total), file=sys.stderr)
+
+    lanes = [soakLane(n, args) for n in range(args.lanes)]
+    if args.trace:
+       lanes[0].link.setTrace(frameTrace())
+    await asyncio.gather(*[runLane(lane, work, stats, progress) for lane in lanes])
+    if args.trace:
+       lanes[0].link.trace.export(args.trace)
+    return { flow : stats[flow].summary() for flow in flows }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the link flows against an emulated noisy network")
+    parser.add_argument("--iterations", type=int, default=1000, help="runs of each flow")
+    parser.add_argument("--flows", default=",".join(FLOWS))
+    parser.add_argument("--lanes", type=int, default=16, help="emulated dongles running at once")
+    parser.add_argument("--receivers", type=int, default=4, help="receivers per lane, plus one PT")
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds each way")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many seconds more, at random")
+    parser.add_argument("--loss", type=float, default=0.0, help="chance a frame is lost")
+    parser.add_argument("--duplicate", type=float, default=0.0, help="chance a reply turns up twice")
+    parser.add_argument("--corrupt", type=float, default=0.0, help="chance a frame has a bit flipped")
+    parser.add_argument("--pt-commit-delay", type=float, default=0.0, help="seconds before a PT write shows in reads")
+    parser.add_argument("--pt-duplicates", type=float, default=0.0, help="chance the PT sends a reply twice")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write the results to this file as well")
+    parser.add_argument("--trace", help="write the first lane's last frames to this file, see frametrace.py")
+    args = parser.parse_args(argv)
+
+    started = time.monotonic()
+    results = asyncio.run(soak(args))
+
+    print ("{:<10s} {:>6s} {:>6s} {:>6s} {:>9s} {:>9s} {:>9s} {:>8s} {:>5s}".format("flow", "runs", "failed", "bad", "p50 ms", "p95 ms", "p99 ms", "retry/op", "max"))
+    for flow, r in results.items():
+        print ("{:<10s} {:6d} {:6d} {:6d} {:9.1f} {:9.1f} {:9.1f} {:8.2f} {:5d}".format(
+               flow, r["runs"], r["failures"], r["bad data"], r["p50 ms"], r["p95 ms"], r["p99 ms"], r["retries/op"], r["max retries"]))
+    print ("{:.0f} s".format(time.monotonic() - started))
+
+    if args.json:
+       with open(args.json, "w") as f:
+          json.dump({ "settings" : vars(args), "results" : results }, f, indent=1)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -142,8 +142,63 @@ class xbeeController:
                break
 
         return msg
-        
-        
+
+##
+## Split a raw read into its API frames, a single USB read can hold several
+##
+
+    def splitFrames(self, size, data):
+        messages = []
+        i = 0
+        while i < size:
+            if data[i] != 0x7e or i + 2 >= size:
+               i += 1                              # not a frame start, skip it
+               continue
+            flen = ((data[i+1] << 8) | data[i+2]) + 4   # start, length and checksum
+            messages.append(list(data[i:min(i+flen, size)]))
+            i += flen
+        return messages
+
+##
+## Protothrottle EEPROM read/write requests, always dest 48 / src 154
+##
+
+    def ptReadRequest(self, address, length):
+        lad = address & 0x00ff
+        had = (address & 0xff00) >> 8
+        return self.xbeeBroadCastRequest(48, 154, [ord('R'), lad, had, length])
+
+    def ptWriteRequest(self, address, data):
+        lad = address & 0x00ff
+        had = (address & 0xff00) >> 8
+        return self.xbeeBroadCastRequest(48, 154, [ord('W'), lad, had] + list(data))
+
+##
+## Decode a PT read reply, 16 bit RX frame with the EE address echoed ahead of the data
+## Returns (address, data) or None if this isn't one, or it was damaged on the way.
+## The Xbee checksum, the MRBus length and CRC all have to check out and it has to
+## be an 'r', a reply that only looks right by address would put bad bytes in a backup
+##
+
+    def parsePtReply(self, msg):
+        if len(msg) < 18 or msg[3] != 129 or not self.frameChecksumOK(msg):
+           return None
+        packet = msg[8:len(msg)-1]             # MRBus dest, src, len, crc low, crc high, 'r', lad, had, data
+        if packet[2] < 8 or packet[2] > len(packet):
+           return None
+        if self.mrbusCRC16Calculate(packet) != packet[3] | (packet[4] << 8):
+           return None
+        if packet[5] != ord('r'):
+           return None
+        address = packet[6] | (packet[7] << 8)
+        return (address, packet[8:packet[2]])
+
+    # whole API frame, length field matches and the bytes after it sum with the checksum to 0xff
+    def frameChecksumOK(self, msg):
+        if len(msg) < 4 or ((msg[1] << 8) | msg[2]) + 4 != len(msg):
+           return False
+        return sum(msg[3:]) & 0xff == 0xff
+
 
 
     # create a valid API transmit frame for Xbee API message - this is for a mac address directed message
@@ -237,4 +292,44 @@ class xbeeController:
         i = (255-cks) & 0x00ff
         frame[length+3] = i
 
-        return frame
\ No newline at end of file
+        return frame
+
+
+##
+## Parse data and make a list of Node Discovery return messages
+## Returns a dict of mac -> ascii node id, addresses if given gets mac -> 16 bit MY address
+## Frames are cut by their length field, a MY or MAC with a 0x7e byte in it is
+## not a frame start, and one that fails its checksum is left out
+##
+
+    def parseMessageData(self, size, data, addresses=None):
+        nodeData = {}
+
+        for msg in self.splitFrames(size, data):
+            if len(msg) <= 20 or not self.frameChecksumOK(msg):
+               continue
+            if msg[3] != 0x88 or msg[5] != ord('N') or msg[6] != ord('D'):
+               continue                           # Node discovery returned message, mac and ascii ID
+            mac = ""
+            id  = ""
+            for i in range(10, 18):
+               mac = mac + "{:02X}".format(msg[i])
+            for i in range(19, len(msg)-2):
+               id = id + chr(msg[i])
+            nodeData[mac] = id
+            if addresses != None:
+               addresses[mac] = (msg[8] << 8) | msg[9]
+        return nodeData
+
+##
+## Parse return data looking for 16 bit return and Receiver return data
+## Cut and checked the same way as the ND replies
+##
+
+    def parseReturnData(self, size, data, msgcode):
+        for msg in self.splitFrames(size, data):
+            if len(msg) > 20 and self.frameChecksumOK(msg):
+               if msg[3] == 129 and msg[9] == msgcode:   # must be 16 bit return packet and a 'W' in the message to be valid
+                  return msg
+
+        return []
@@ -0,0 +1,433 @@
+##
+## Xbee dongle link, everything sent to the dongle goes through here
+##
+## Frames are queued by priority class and each class has a token bucket so bulk
+## transfers can't crowd out control traffic, but still use whatever is spare.
+## Frames that are ready together go out joined in one USB transfer.
+##
+
+import asyncio
+import collections
+import itertools
+import time
+
+from .frametrace import TRACE_TX, TRACE_RX, TRACE_START, TRACE_END
+
+# Priority classes, lowest number goes first
+
+CONTROL   = 0        # real time, throttle and receiver output changes
+CONFIG    = 1        # interactive configuration, screen queries
+BULK      = 2        # PT EEPROM transfers
+DISCOVERY = 3        # network discovery
+
+# Rate limits per class, frames per second and burst size, None is unlimited
+# The UART is 38400 baud, roughly 150 of our frames a second
+
+CLASS_RATES = {
+    CONTROL   : None,
+    CONFIG    : (40, 8),
+    BULK      : (80, 12),
+    DISCOVERY : (2, 1),
+}
+
+USB_PACKET_SIZE = 64                 # CP210x bulk OUT max packet, the app sets it from the endpoint
+COALESCE_WINDOW = 0.002              # seconds to wait for more frames to join a part filled transfer
+
+
+class tokenBucket:
+    def __init__(self, rate, burst):
+        self.rate   = rate
+        self.burst  = burst
+        self.tokens = burst
+        self.stamp  = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    # seconds until a token is free, 0 if there is one now
+    def wait(self):
+        self.refill()
+        if self.tokens >= 1:
+           return 0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens = self.tokens - 1
+
+
+##
+## Transmit scheduler, send() queues a frame and returns once it has gone out
+##
+
+class txScheduler:
+    def __init__(self, write):
+        self.write   = write         # writes bytes to the dongle in one transfer, not a coroutine
+        self.packetSize = USB_PACKET_SIZE
+        self.queues  = {}
+        self.buckets = {}
+        for cls, rate in CLASS_RATES.items():
+            self.queues[cls] = collections.deque()
+            if rate != None:
+               self.buckets[cls] = tokenBucket(rate[0], rate[1])
+        self.wakeup = asyncio.Event()
+        self.online = asyncio.Event()     # cleared while the dongle is unplugged, frames wait for it
+        self.online.set()
+        self.task = None
+        self.trace = None                 # frameTrace while tracing is on, see frametrace.py
+
+    # tag is the transaction the frame belongs to, it only shows in the trace
+    async def send(self, frame, priority=CONFIG, tag=None):
+        await self.sendAll([frame], priority, tag)
+
+    # queue several frames at once so they can share transfers, returns once all have gone
+    async def sendAll(self, frames, priority=CONFIG, tag=None):
+        waits = []
+        for frame in frames:
+            done = asyncio.get_event_loop().create_future()
+            self.queues[priority].append((bytes(frame), done, tag))
+            waits.append(done)
+        self.wakeup.set()
+        if self.task == None or self.task.done():
+           self.task = asyncio.get_event_loop().create_task(self.run())
+        await asyncio.gather(*waits)
+
+    # next frame to go, highest class with a token, or how long until one is free
+    # with room set, a frame that won't fit ends the search so nothing jumps the queue
+    def nextFrame(self, room=None):
+        delay = None
+        for cls in sorted(self.queues):
+            if not self.queues[cls]:
+               continue
+            if room != None and len(self.queues[cls][0][0]) > room:
+               return None, None
+            bucket = self.buckets.get(cls)
+            wait = 0 if bucket == None else bucket.wait()
+            if wait == 0:
+               if bucket != None:
+                  bucket.take()
+               return self.queues[cls].popleft(), 0
+            if delay == None or wait < delay:
+               delay = wait
+        return None, delay
+
+    async def run(self):
+        while True:
+            item, delay = self.nextFrame()
+
+            if item == None:
+               self.wakeup.clear()
+               try:
+                  await asyncio.wait_for(self.wakeup.wait(), delay)
+               except asyncio.TimeoutError:
+                  pass
+               continue
+
+            batch = await self.fillBatch([item])
+            if not batch:
+               continue
+            data = b"".join(frame for frame, done, tag in batch)
+            try:
+               await self.online.wait()
+               while self.write(data) == False:     # dongle went away, hold the batch until it's back
+                  self.online.clear()
+                  await self.online.wait()
+               if self.trace != None:
+                  for frame, done, tag in batch:
+                      self.trace.record(TRACE_TX, frame, tag)
+               for frame, done, tag in batch:
+                   if not done.done():
+                      done.set_result(True)
+            except Exception as e:
+               for frame, done, tag in batch:
+                   if not done.done():
+                      done.set_exception(e)
+
+    # add whatever else is ready, up to one packet, giving stragglers a moment to turn up
+    async def fillBatch(self, batch):
+        waited = False
+        while True:
+            batch = [b for b in batch if not b[1].cancelled()]
+            room = self.packetSize - sum(len(frame) for frame, done, tag in batch)
+            if room <= 0 or not batch:
+               return batch
+            item, delay = self.nextFrame(room)
+            if item != None:
+               batch.append(item)
+               continue
+            if waited:
+               return batch
+            waited = True
+            await asyncio.sleep(COALESCE_WINDOW)
+
+##
+## Transactions, one request/reply exchange with the dongle at a time
+##
+## Anything that waits for a reply runs as a transaction. The link lock makes sure
+## only one transaction reads from the dongle, so a reply always goes to the code
+## that asked for it. Each transaction has a deadline and can be cancelled, and is
+## tagged with the screen that started it so a screen change can drop stale work.
+## Fire and forget frames don't need a transaction, they go straight to the scheduler.
+##
+## Every transaction starts clean, the dongle's receive FIFO is purged and anything
+## left in our own buffer is thrown away, so a late answer to an earlier request
+## can't be taken for this one's reply.
+##
+
+LINK_READ_TIMEOUT = 250              # ms per USB read, short so a cancelled read lets go quickly
+MAX_FRAME         = 256              # longer length field than this is line noise, not a frame
+
+
+transactionNumbers = itertools.count(1)    # every transaction on every link gets its own, for the trace
+
+
+class transactionCancelled(Exception):
+    pass
+
+
+class xbeeTransaction:
+    def __init__(self, link, name, deadline, group):
+        self.link  = link
+        self.name  = name
+        self.group = group
+        self.deadline = None if deadline == None else time.monotonic() + deadline
+        self.task  = None
+        self.cancelled = False
+        self.number = next(transactionNumbers)
+
+    def cancel(self):
+        self.cancelled = True
+        if self.task != None:
+           self.task.cancel()
+
+    # seconds left before the deadline, None if there isn't one
+    def remaining(self):
+        if self.deadline == None:
+           return None
+        return max(0, self.deadline - time.monotonic())
+
+    def __await__(self):
+        return self.task.__await__()
+
+    # jobs take their time and waits from the link, so a replay can run them without the radio's delays
+    def now(self):
+        return self.link.now()
+
+    async def sleep(self, seconds):
+        await self.link.pause(seconds)
+
+    async def send(self, frame, priority=CONFIG):
+        await self.link.scheduler.send(frame, priority, self.number)
+
+    async def sendAll(self, frames, priority=CONFIG):
+        await self.link.scheduler.sendAll(frames, priority, self.number)
+
+    # whatever bytes the dongle has, empty if nothing turned up
+    async def receive(self):
+        await self.link.waitOnline(self.remaining())
+        return await self.link.receive(self.remaining(), self.number)
+
+    # read until match picks out a frame and return it, the deadline ends the wait
+    async def waitFor(self, match):
+        while True:
+            data = await self.receive()
+            for msg in self.link.Xbee.splitFrames(len(data), data):
+                if match(msg):
+                   return msg
+
+
+class xbeeLink:
+    def __init__(self, xbee, scheduler, read, purge=None):
+        self.Xbee      = xbee
+        self.scheduler = scheduler
+        self.read      = read            # read(timeout ms) returns bytes from the dongle, blocks, not a coroutine
+        self.purge     = purge           # optional, empties the dongle's receive FIFO
+        self.lock      = asyncio.Lock()
+        self.active    = set()
+        self.reading   = None            # USB read running in a worker thread
+        self.rxbuffer  = bytearray()     # bytes read but not handed out yet, a frame cut off by the end of a read
+        self.trace     = None            # frameTrace while tracing is on
+
+    def setTrace(self, trace):
+        self.trace = trace
+        self.scheduler.trace = trace
+
+    def now(self):
+        return time.monotonic()
+
+    # time the devices get to answer
+    async def pause(self, seconds):
+        await asyncio.sleep(seconds)
+
+    # reads run off the event loop so the screen keeps going while we wait on the dongle
+    # returns whole frames only, a partial one at the end is kept for the next read
+    async def receive(self, remaining=None, txid=None):
+        timeout = LINK_READ_TIMEOUT
+        if remaining != None:
+           timeout = max(1, min(timeout, int(remaining * 1000)))     # 0 would mean wait forever
+        self.reading = asyncio.ensure_future(asyncio.get_event_loop().run_in_executor(None, self.read, timeout))
+        chunk = await asyncio.shield(self.reading)
+        self.rxbuffer.extend(chunk)
+        data = self.takeFrames()
+        if self.trace != None:
+           self.trace.read(chunk, txid)
+           for frame in self.Xbee.splitFrames(len(data), data):
+               self.trace.record(TRACE_RX, frame, txid)
+        return data
+
+    def takeFrames(self):
+        buf = self.rxbuffer
+        end = 0
+        i = 0
+        while i < len(buf):
+            if buf[i] != 0x7e:
+               i = i + 1                  # not a frame start, goes out with the rest for splitFrames to skip
+               end = i
+               continue
+            if i + 2 >= len(buf):
+               break
+            flen = ((buf[i+1] << 8) | buf[i+2]) + 4
+            if flen > MAX_FRAME:
+               i = i + 1
+               end = i
+               continue
+            if i + flen > len(buf):
+               break
+            i = i + flen
+            end = i
+        data = bytes(buf[:end])
+        del buf[:end]
+        return data
+
+    # while the dongle is unplugged there is nothing to read, wait for it to come back
+    async def waitOnline(self, remaining=None):
+        if not self.scheduler.online.is_set():
+           await asyncio.wait_for(self.scheduler.online.wait(), remaining)
+
+    # a cancelled transaction can leave a read going, whatever it gets is stale
+    async def settle(self):
+        if self.reading != None and not self.reading.done():
+           try:
+              await self.reading
+           except Exception:
+              pass
+        self.reading = None
+
+    # drop anything that arrived before now, in the dongle and in our buffer
+    async def flush(self):
+        await self.settle()
+        if self.purge != None:
+           self.purge()
+        self.rxbuffer = bytearray()
+
+    # start a transaction, job(tx) runs once the link is free, await the result for job's return value
+    def start(self, name, job, deadline=None, group=None):
+        tx = xbeeTransaction(self, name, deadline, group)
+        self.active.add(tx)
+        tx.task = asyncio.get_event_loop().create_task(self.runTransaction(tx, job))
+        return tx
+
+    async def runTransaction(self, tx, job):
+        try:
+           async with self.lock:
+              await self.flush()
+              if self.trace != None:
+                 self.trace.mark(TRACE_START, tx.number, tx.name)
+              if tx.deadline == None:
+                 return await job(tx)
+              return await asyncio.wait_for(job(tx), tx.remaining())
+        finally:
+           self.active.discard(tx)
+           if self.trace != None:
+              self.trace.mark(TRACE_END, tx.number, tx.name)
+
+    # run a transaction to the end, raises asyncio.TimeoutError past the deadline
+    # and transactionCancelled if it was dropped by a screen change
+    async def transact(self, name, job, deadline=None, group=None):
+        tx = self.start(name, job, deadline, group)
+        try:
+           return await tx
+        except asyncio.CancelledError:
+           if tx.cancelled:
+              raise transactionCancelled(name)
+           raise
+
+    # cancel everything started from another screen, None cancels the lot
+    def cancelOthers(self, group=None):
+        for tx in list(self.active):
+            if group == None or tx.group != group:
+               tx.cancel()
+
+##
+## Several dongles at once, each with its own link. Transactions and frames go to
+## whichever link has the least waiting on it, so separate jobs run side by side.
+## A link whose dongle is unplugged stays in the pool holding its work, but gets
+## nothing new until it comes back.
+##
+
+OFFLINE_LOAD = 1000                  # an unplugged dongle only gets work if every dongle is unplugged
+
+
+class linkPool:
+    def __init__(self, connect=None):
+        self.links = []
+        self.added = asyncio.Event()
+        self.connect = connect       # optional, opens the dongles, called the first time anything needs one
+        self.trace = None
+
+    def add(self, link):
+        link.setTrace(self.trace)
+        self.links.append(link)
+        self.added.set()
+
+    # trace every link's frames into trace, None turns tracing off
+    def setTrace(self, trace):
+        self.trace = trace
+        for link in self.links:
+            link.setTrace(trace)
+
+    # transactions running or waiting plus frames queued
+    def load(self, link):
+        waiting = len(link.active) + sum(len(q) for q in link.scheduler.queues.values())
+        if not link.scheduler.online.is_set():
+           waiting = waiting + OFFLINE_LOAD
+        return waiting
+
+    # least loaded link
+    def pick(self):
+        return min(self.links, key=self.load)
+
+    # before the first dongle is plugged in there is nowhere to send anything
+    async def waitForLink(self):
+        if self.connect != None:
+           connect = self.connect
+           self.connect = None
+           connect()
+        while not self.links:
+            self.added.clear()
+            await self.added.wait()
+
+    # same as xbeeLink.transact, on the least loaded link, time spent waiting for a dongle counts
+    async def transact(self, name, job, deadline=None, group=None):
+        if not self.links:
+           started = time.monotonic()
+           await asyncio.wait_for(self.waitForLink(), deadline)
+           if deadline != None:
+              deadline = max(0, deadline - (time.monotonic() - started))
+        return await self.pick().transact(name, job, deadline, group)
+
+    async def send(self, frame, priority=CONFIG):
+        await self.waitForLink()
+        await self.pick().scheduler.send(frame, priority)
+
+    async def sendAll(self, frames, priority=CONFIG):
+        await self.waitForLink()
+        await self.pick().scheduler.sendAll(frames, priority)
+
+    def online(self):
+        return any(link.scheduler.online.is_set() for link in self.links)
+
+    def cancelOthers(self, group=None):
+        for link in self.links:
+            link.cancelOthers(group)
@@ -0,0 +1,91 @@
+##
+## Request/reply exchanges the screens run as link transactions, network discovery
+## and the receiver queries. Each takes the transaction as its first argument, so
+## the app hands them to link.transact, and tools/soak.py and tools/replay.py run the
+## same ones headless.
+##
+
+from .xbeelink import DISCOVERY
+from .devicecache import RECEIVER, PROTOTHROTTLE
+from .pttransfer import PT_SLOT_SIZE, PT_BLOCK_SIZE
+from .receiverids import RETURNTYPE, RETURNNOTCHES, GETPHYSICS
+
+DISCOVER_WAIT   = 2                 # seconds the radios get to answer ND before we read
+PROBE_WAIT      = 0.25
+RECEIVER_WINDOW = 1.0               # a receiver gets this long before a PT answer from a node we can't place counts
+
+DISCOVER_DEADLINE = 4               # transaction time limits, seconds
+PROBE_DEADLINE    = 1.5
+QUERY_DEADLINE    = 3
+
+RECEIVER_CONFIG = 87                # 'W', reply code of the receiver config query
+RECEIVER_PHYSICS = 80               # 'P', reply code of GETPHYSICS
+
+ND_REQUEST = bytearray([0x7E, 0x00, 0x04, 0x08, 0x01, 0x4E, 0x44, 0x64])
+
+# receiver query command -> code its reply comes back with
+QUERY_REPLIES = {
+    RETURNTYPE    : RECEIVER_CONFIG,
+    RETURNNOTCHES : RECEIVER_CONFIG,
+    GETPHYSICS    : RECEIVER_PHYSICS,
+}
+
+
+# Broadcast Network Discovery, all Xbees respond with MAC and ascii ID, returns everything read
+async def discoverNodes(tx, wait=DISCOVER_WAIT):
+    await tx.send(ND_REQUEST, DISCOVERY)
+    await tx.sleep(wait)
+
+    data = bytearray()
+    while True:
+        more = await tx.receive()
+        if len(more) == 0:
+           return data
+        data.extend(more)
+
+# Ask the receiver for something and wait for its answer, the reply code picks it out
+# Only this transaction reads the dongle, so any other frame is just not ours
+async def receiverQuery(tx, xbee, mac, command):
+    msgcode = QUERY_REPLIES[command]
+    data = chr(command) + "000000000000000000"
+    await tx.send(xbee.buildXbeeTransmitData(xbee.buildAddress(mac), data))
+    return await tx.waitFor(lambda msg: len(msg) > 20 and msg[3] == 129 and msg[9] == msgcode)
+
+##
+## Send the receiver query and the PT slot 1 read together, whichever answers says what it is
+## A receiver answer wins if both turn up in the same read. The PT read is a broadcast
+## every PT in range answers, so a PT answer only counts if it came from my, the node's
+## 16 bit address from its ND reply. Without one, a PT answer is held until the receiver
+## has had RECEIVER_WINDOW to answer.
+## Returns (RECEIVER, config reply) or (PROTOTHROTTLE, slot 1 header), runs until the deadline
+##
+
+async def probeTransaction(tx, xbee, mac, known, my=None):
+    started = tx.now()
+    if my == 0xfffe:
+       my = None                    # MAC only, its answers don't say who sent them
+    address = xbee.buildAddress(mac)
+    await tx.send(xbee.buildXbeeTransmitData(address, chr(RETURNTYPE) + "000000000000000000"))
+    if known != RECEIVER:
+       await tx.send(xbee.ptReadRequest(PT_SLOT_SIZE, PT_BLOCK_SIZE))
+
+    header = None
+    while True:
+        await tx.sleep(PROBE_WAIT)
+        data = await tx.receive()
+
+        # find the message we need, it's a specific API response from the receiver
+        message = xbee.parseReturnData(len(data), data, RECEIVER_CONFIG)
+        if message:
+           return RECEIVER, message
+
+        for msg in xbee.splitFrames(len(data), data):
+            reply = xbee.parsePtReply(msg)
+            if reply == None or reply[0] != PT_SLOT_SIZE or len(reply[1]) < PT_BLOCK_SIZE:
+               continue
+            if my != None and ((msg[4] << 8) | msg[5]) != my:
+               continue             # some other PT answering the broadcast
+            header = reply[1][:PT_BLOCK_SIZE]
+
+        if header != None and (my != None or tx.now() - started >= RECEIVER_WINDOW):
+           return PROTOTHROTTLE, header